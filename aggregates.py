@@ -0,0 +1,172 @@
+"""
+Alpha Prophet Aggregates
+Materialized rollups of the fact tables, built once per dataset version
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    from indexes import TrigramIndex, _REGEX_META
+except ImportError:
+    from .indexes import TrigramIndex, _REGEX_META
+
+WAREHOUSES = ['California', 'Houston', 'West Memphis']
+
+
+def _rollup(facts: pd.DataFrame, keys: pd.Series, rank_by: tuple, top_n: int) -> Dict[Any, Dict[str, Any]]:
+    """Totals and top-N rankings for each distinct key, computed on that key's rows"""
+    rollup = {}
+    for key, rows in keys.groupby(keys, observed=True).indices.items():
+        group = facts.iloc[rows]
+        rollup[key] = {
+            'orders': len(group),
+            'quantity': group['Quantity'].sum(),
+            # Same groupby/sort as a per-request query, so ties rank the same way
+            'top': {
+                col: group.groupby(col, observed=True)['Quantity'].sum().sort_values(ascending=False).head(top_n)
+                for col in rank_by
+            },
+        }
+    return rollup
+
+
+class SalesCube:
+    """
+    Sales order lines rolled up by state, product, model warehouse and month
+
+    cells holds quantity and order counts for every observed combination;
+    the per-state and per-warehouse rollups hold the totals and top-N
+    rankings the tools return, so a lookup is a dict access.
+    """
+
+    def __init__(self, facts: pd.DataFrame, top_n: int = 5):
+        self.rows = len(facts)
+
+        month = facts['Order Date'].dt.to_period('M').rename('Month')
+        self.cells = facts.groupby(
+            [facts['State'], facts['Product'], facts['Warehouse'], month],
+            observed=True, dropna=False
+        )['Quantity'].agg(quantity='sum', orders='count').reset_index()
+
+        # States are matched case-insensitively by the tools
+        self._states = _rollup(facts, facts['State'].astype(str).str.upper(), ('Product',), top_n)
+        self._warehouses = _rollup(facts, facts['Warehouse'], ('Product', 'State'), top_n)
+
+    def state(self, state: str) -> Optional[Dict[str, Any]]:
+        """Rollup for one state (name matched case-insensitively), None if it has no orders"""
+        return self._states.get(state.upper())
+
+    def warehouse(self, warehouse: str) -> Optional[Dict[str, Any]]:
+        """Rollup for one model warehouse, None if it has no orders"""
+        return self._warehouses.get(warehouse)
+
+
+def _profile_key(product_name: str) -> str:
+    """Lookup key under which queries match the same products: literal ASCII
+    names match case-insensitively, anything else only as typed"""
+    if product_name.isascii() and not (_REGEX_META & set(product_name)):
+        return product_name.upper()
+    return product_name
+
+
+class DistributionTable:
+    """
+    Historical order lines and quantity per product and model warehouse
+
+    Built in one grouped pass over the order lines. A product query resolves
+    the product names it matches through the trigram index and sums their
+    rows. The resulting warehouse shares are precomputed for every product
+    name with at least min_orders lines (other than names containing regex
+    metacharacters), so querying a known product is a dict lookup.
+    """
+
+    def __init__(self, facts: pd.DataFrame, products: TrigramIndex, min_orders: int = 5):
+        categories = facts['Product'].cat.categories
+        if categories is not products.values and not categories.equals(products.values):
+            products = TrigramIndex(categories)
+        self.products = products
+
+        codes = facts['Product'].cat.codes.to_numpy().astype(np.int64)
+        warehouse = pd.Categorical(facts['Warehouse'], categories=WAREHOUSES).codes.astype(np.int64)
+        # Rows routed anywhere else still count towards the product total
+        warehouse[warehouse < 0] = len(WAREHOUSES)
+
+        width = len(WAREHOUSES) + 1
+        cells = codes * width + warehouse
+        size = len(categories) * width
+        self.quantities = np.bincount(
+            cells, weights=facts['Quantity'].to_numpy(dtype=float), minlength=size
+        ).reshape(-1, width)
+        self.orders = np.bincount(codes, minlength=len(categories))
+
+        self.profiles = {}
+        for name in categories:
+            # Names that read as a pattern ("Rod (Type A") are left to the query
+            # path - matched as typed, they may not even compile
+            if _REGEX_META & set(name):
+                continue
+            profile = self._profile(name)
+            if profile[0] >= min_orders:
+                self.profiles[_profile_key(name)] = profile
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def split(self, product_name: str) -> Tuple[int, Dict[str, float], float]:
+        """(order lines, quantity per warehouse, total quantity) of the products
+        matching product_name, case-insensitively, as get_distribution matches them"""
+        hits = self.products.value_hits(product_name, ignore_case=True)[:-1]
+        quantities = self.quantities[hits].sum(axis=0)
+        return int(self.orders[hits].sum()), dict(zip(WAREHOUSES, quantities)), quantities.sum()
+
+    def _profile(self, product_name: str) -> Tuple[int, Dict[str, float]]:
+        orders, warehouse_qty, total_qty = self.split(product_name)
+        if total_qty == 0:
+            total_qty = 1
+        return orders, {wh: warehouse_qty.get(wh, 0) / total_qty for wh in WAREHOUSES}
+
+    def profile(self, product_name: str) -> Tuple[int, Dict[str, float]]:
+        """(order lines, share of quantity per warehouse) for a product query"""
+        profile = self.profiles.get(_profile_key(product_name))
+        if profile is None:
+            profile = self._profile(product_name)
+        return profile
+
+    def profile_many(self, product_names: Iterable[str]) -> Dict[str, Tuple[int, Dict[str, float]]]:
+        """
+        profile() for several product queries at once: known products are
+        dict lookups, the rest are matched together and summed as one
+        (queries x products) product with the order and quantity tables.
+        Queries that aren't valid patterns are left out.
+        """
+        results, pending = {}, {}
+        for name in product_names:
+            key = _profile_key(name)
+            if key in self.profiles:
+                results[name] = self.profiles[key]
+            else:
+                pending.setdefault(key, []).append(name)
+
+        queries, hits = [], []
+        for names in pending.values():
+            try:
+                hits.append(self.products.value_hits(names[0], ignore_case=True)[:-1])
+            except re.error:
+                continue
+            queries.append(names)
+        if not queries:
+            return results
+
+        hits = np.array(hits, dtype=float)
+        orders = hits @ self.orders
+        quantities = hits @ self.quantities[:, :len(WAREHOUSES)]
+        totals = (hits @ self.quantities).sum(axis=1)
+        totals[totals == 0] = 1
+        for names, count, warehouse_qty, total in zip(queries, orders, quantities, totals):
+            profile = (int(count), dict(zip(WAREHOUSES, warehouse_qty / total)))
+            for name in names:
+                results[name] = profile
+        return results
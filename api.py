@@ -1,12 +1,16 @@
 """
 Alpha Prophet FastAPI Server
-Exposes all 12 tools as REST endpoints for the web frontend
+Exposes all 13 tools as REST endpoints for the web frontend
 """
 
+from contextlib import asynccontextmanager, nullcontext
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, List
+import asyncio
+import threading
 import uvicorn
 import os
 
@@ -16,25 +20,26 @@ def _stub(*args, **kwargs):
 
 try:
     from tools import (
-        get_distribution,
-        analyze_state,
-        get_warehouse_info,
-        forecast_demand,
-        get_backlog_summary,
-        compare_routing,
-        recommend_east_coast_location,
-        search_orders,
-        search_freight,
-        estimate_shipping_cost,
-        compare_routing_cost,
-        analyze_cost_savings,
+        build_snapshots,
+        cache_stats,
+        call_tool,
+        data_version,
+        readiness,
+        warm_up,
+        DATASETS,
+        DATA_WATCHER,
     )
+    data_snapshot = DATASETS.pinned
 except ImportError as e:
     print(f"Warning: Could not import tools: {e}")
-    get_distribution = analyze_state = get_warehouse_info = _stub
-    forecast_demand = get_backlog_summary = compare_routing = _stub
-    recommend_east_coast_location = search_orders = search_freight = _stub
-    estimate_shipping_cost = compare_routing_cost = analyze_cost_savings = _stub
+    build_snapshots = _stub
+    call_tool = lambda tool_name, **kwargs: _stub()
+    cache_stats = lambda: {}
+    data_version = lambda: None
+    readiness = lambda: {"ready": True, "status": "ready", "failed": [], "datasets": {}}
+    warm_up = _stub
+    data_snapshot = nullcontext
+    DATA_WATCHER = None
 
 try:
     from google_maps import optimize_shipment
@@ -42,10 +47,33 @@ except ImportError as e:
     print(f"Warning: Could not import google_maps: {e}")
     optimize_shipment = _stub
 
+def prepare_data():
+    # Compile stale Excel sources into columnar snapshots, then load them
+    report = build_snapshots()
+    if isinstance(report, dict) and "error" not in report:
+        written = [name for name, info in report.items() if info.get("status") == "written"]
+        if written:
+            print(f"Snapshots rebuilt: {', '.join(written)}")
+    warm_up()
+    # Pick up data files changed while the server runs
+    if DATA_WATCHER is not None:
+        DATA_WATCHER.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so /health answers at once; /ready turns 200 when done
+    threading.Thread(target=prepare_data, name="warm-up", daemon=True).start()
+    yield
+    if DATA_WATCHER is not None:
+        await asyncio.to_thread(DATA_WATCHER.stop)
+
+
 app = FastAPI(
     title="Alpha Prophet API",
     description="Warehouse optimization tools for Sediver USA",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for Next.js frontend (local + Vercel)
@@ -62,9 +90,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Version"],
 )
 
 
+@app.middleware("http")
+async def pin_data_version(request, call_next):
+    # A request reads one data version start to finish, even if a reload swaps mid-request
+    with data_snapshot() as version:
+        response = await call_next(request)
+    if version:
+        response.headers["X-Data-Version"] = version
+    return response
+
+
 # Request models
 class DistributionRequest(BaseModel):
     product_name: str
@@ -72,6 +111,10 @@ class DistributionRequest(BaseModel):
     customer_state: Optional[str] = None
 
 
+class DistributionBatchRequest(BaseModel):
+    items: List[DistributionRequest]
+
+
 class StateRequest(BaseModel):
     state: str
 
@@ -122,6 +165,13 @@ class RoutingCostRequest(BaseModel):
     pallets: Optional[float] = None
 
 
+class BulkShippingCostRequest(BaseModel):
+    to_states: List[str]
+    weight_lbs: Optional[List[Optional[float]]] = None
+    pallets: Optional[List[Optional[float]]] = None
+    transport_types: Optional[List[Optional[str]]] = None
+
+
 class CostSavingsRequest(BaseModel):
     scenario: Optional[str] = "all"
 
@@ -138,57 +188,83 @@ def api_response(data: Any):
     return {"success": True, "data": data}
 
 
-# Endpoints
+# Endpoints - tool calls may wait on a dataset build, so they are plain functions
+# run in the threadpool rather than blocking the event loop
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "Alpha Prophet API"}
+    return {"status": "ok", "service": "Alpha Prophet API", "data_version": data_version()}
+
+
+@app.get("/ready")
+async def readiness_check():
+    # 503 until warm-up has loaded every dataset (or if any failed to load),
+    # so traffic only reaches warm, healthy instances
+    report = readiness()
+    return JSONResponse(report, status_code=200 if report.get("ready") else 503)
+
+
+@app.get("/api/cache-stats")
+async def api_cache_stats():
+    return api_response(cache_stats())
 
 
 @app.post("/api/get-distribution")
-async def api_get_distribution(req: DistributionRequest):
-    result = get_distribution(req.product_name, req.quantity, req.customer_state)
+def api_get_distribution(req: DistributionRequest):
+    result = call_tool(
+        "get_distribution",
+        product_name=req.product_name,
+        quantity=req.quantity,
+        customer_state=req.customer_state,
+    )
+    return api_response(result)
+
+
+@app.post("/api/get-distribution-batch")
+def api_get_distribution_batch(req: DistributionBatchRequest):
+    result = call_tool("get_distribution_batch", items=[item.model_dump() for item in req.items])
     return api_response(result)
 
 
 @app.post("/api/analyze-state")
-async def api_analyze_state(req: StateRequest):
-    result = analyze_state(req.state)
+def api_analyze_state(req: StateRequest):
+    result = call_tool("analyze_state", state=req.state)
     return api_response(result)
 
 
 @app.post("/api/get-warehouse-info")
-async def api_get_warehouse_info(req: WarehouseRequest):
-    result = get_warehouse_info(req.warehouse)
+def api_get_warehouse_info(req: WarehouseRequest):
+    result = call_tool("get_warehouse_info", warehouse=req.warehouse)
     return api_response(result)
 
 
 @app.post("/api/forecast-demand")
-async def api_forecast_demand(req: ForecastRequest):
-    result = forecast_demand(req.product_name, req.months)
+def api_forecast_demand(req: ForecastRequest):
+    result = call_tool("forecast_demand", product_name=req.product_name, months=req.months)
     return api_response(result)
 
 
 @app.post("/api/get-backlog-summary")
-async def api_get_backlog_summary(req: BacklogRequest):
-    result = get_backlog_summary(req.group_by)
+def api_get_backlog_summary(req: BacklogRequest):
+    result = call_tool("get_backlog_summary", group_by=req.group_by)
     return api_response(result)
 
 
 @app.post("/api/compare-routing")
-async def api_compare_routing():
-    result = compare_routing()
+def api_compare_routing():
+    result = call_tool("compare_routing")
     return api_response(result)
 
 
 @app.post("/api/recommend-east-coast-location")
-async def api_recommend_east_coast(req: EastCoastRequest):
-    result = recommend_east_coast_location(req.top_n)
+def api_recommend_east_coast(req: EastCoastRequest):
+    result = call_tool("recommend_east_coast_location", top_n=req.top_n)
     return api_response(result)
 
 
 @app.post("/api/search-orders")
-async def api_search_orders(req: SearchOrdersRequest):
-    result = search_orders(
+def api_search_orders(req: SearchOrdersRequest):
+    result = call_tool(
+        "search_orders",
         customer=req.customer,
         product=req.product,
         state=req.state,
@@ -199,8 +275,9 @@ async def api_search_orders(req: SearchOrdersRequest):
 
 
 @app.post("/api/search-freight")
-async def api_search_freight(req: SearchFreightRequest):
-    result = search_freight(
+def api_search_freight(req: SearchFreightRequest):
+    result = call_tool(
+        "search_freight",
         warehouse=req.warehouse,
         date_range=req.date_range,
         destination=req.destination,
@@ -210,8 +287,9 @@ async def api_search_freight(req: SearchFreightRequest):
 
 
 @app.post("/api/estimate-shipping-cost")
-async def api_estimate_shipping_cost(req: ShippingCostRequest):
-    result = estimate_shipping_cost(
+def api_estimate_shipping_cost(req: ShippingCostRequest):
+    result = call_tool(
+        "estimate_shipping_cost",
         from_warehouse=req.from_warehouse,
         to_state=req.to_state,
         weight_lbs=req.weight_lbs,
@@ -222,8 +300,9 @@ async def api_estimate_shipping_cost(req: ShippingCostRequest):
 
 
 @app.post("/api/compare-routing-cost")
-async def api_compare_routing_cost(req: RoutingCostRequest):
-    result = compare_routing_cost(
+def api_compare_routing_cost(req: RoutingCostRequest):
+    result = call_tool(
+        "compare_routing_cost",
         to_state=req.to_state,
         weight_lbs=req.weight_lbs,
         pallets=req.pallets,
@@ -231,14 +310,26 @@ async def api_compare_routing_cost(req: RoutingCostRequest):
     return api_response(result)
 
 
+@app.post("/api/estimate-shipping-cost-bulk")
+def api_estimate_shipping_cost_bulk(req: BulkShippingCostRequest):
+    result = call_tool(
+        "estimate_shipping_cost_bulk",
+        to_states=req.to_states,
+        weight_lbs=req.weight_lbs,
+        pallets=req.pallets,
+        transport_types=req.transport_types,
+    )
+    return api_response(result)
+
+
 @app.post("/api/analyze-cost-savings")
-async def api_analyze_cost_savings(req: CostSavingsRequest):
-    result = analyze_cost_savings(req.scenario)
+def api_analyze_cost_savings(req: CostSavingsRequest):
+    result = call_tool("analyze_cost_savings", scenario=req.scenario)
     return api_response(result)
 
 
 @app.post("/api/google-maps")
-async def api_google_maps(req: GoogleMapsRequest):
+def api_google_maps(req: GoogleMapsRequest):
     result = optimize_shipment(req.destination, req.weight_lbs)
     return api_response(result)
 
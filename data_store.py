@@ -0,0 +1,845 @@
+"""
+Alpha Prophet Data Store
+Process-wide dataset cache shared by all tools
+"""
+
+import os
+import sys
+import copy
+import time
+import hashlib
+import numbers
+import datetime
+import tempfile
+import posixpath
+import zipfile
+import contextlib
+import contextvars
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from xml.etree import ElementTree
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Copy-on-write is always on from pandas 3.0, opt-in on 2.x
+COPY_ON_WRITE_DEFAULT = int(pd.__version__.split('.')[0]) >= 3
+
+
+def enable_copy_on_write():
+    """Opt in to copy-on-write on pandas 2.x"""
+    if not COPY_ON_WRITE_DEFAULT:
+        pd.set_option('mode.copy_on_write', True)
+
+
+# On for every importer of the cache (API, CLI, ingest, tests), so cached frames
+# are handed out as shallow copies instead of deep copies of whole datasets
+enable_copy_on_write()
+
+
+def copy_on_write_enabled() -> bool:
+    return COPY_ON_WRITE_DEFAULT or bool(pd.get_option('mode.copy_on_write'))
+
+
+def file_signature(paths: Iterable[str]) -> Tuple:
+    """(path, mtime, size) for each path - None entries for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def directory_signature(directory: str) -> Tuple:
+    """file_signature of every data file in a directory (hidden files and Excel lock files skipped)"""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return ()
+    paths = [
+        os.path.join(directory, name) for name in names
+        if not name.startswith(('.', '~$')) and os.path.isfile(os.path.join(directory, name))
+    ]
+    return file_signature(paths)
+
+
+def signature_version(signature: Tuple) -> str:
+    """Short stable id for a directory signature"""
+    return hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+
+
+def directory_version(directory: str) -> str:
+    return signature_version(directory_signature(directory))
+
+
+def read_only_view(value: Any) -> Any:
+    """
+    Hand out cached frames as copies so callers can't mutate the cache -
+    shallow under copy-on-write, full copies otherwise
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not copy_on_write_enabled())
+    return value
+
+
+def _is_mixed(series: pd.Series) -> bool:
+    """Object column holding something other than plain text, dates or flags"""
+    if series.dtype != object:
+        return False
+    return pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty', 'datetime', 'date', 'boolean')
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, numbers.Number) and not isinstance(value, (bool, np.bool_))
+
+
+def _settle_mixed(series: pd.Series) -> pd.Series:
+    """
+    One type for an object column whose values are all numbers (ints and
+    floats from Excel) or all dates. A column holding any text is left as
+    it is, so no value is dropped or rewritten.
+    """
+    values = series.dropna()
+    if values.map(_is_number).all():
+        return pd.to_numeric(series)
+    if values.map(lambda v: isinstance(v, (datetime.date, np.datetime64))).all():
+        return pd.to_datetime(series)
+    return series
+
+
+def compact_frame(df: pd.DataFrame, categories: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Shrink a frame in memory: repeated strings become categoricals and
+    whole-number columns are downcast to int32 when they fit. Fractional
+    floats (costs) stay float64 so money sums don't drift. Object columns
+    of only numbers (or only dates) are settled to one type, so a frame
+    parsed from Excel has the same dtypes as its snapshot; columns that
+    mix in text stay object.
+    """
+    categories = set(categories)
+    df = df.copy(deep=False)
+    int32 = np.iinfo(np.int32)
+
+    for col in df.columns:
+        if _is_mixed(df[col]):
+            df[col] = _settle_mixed(df[col])
+        series = df[col]
+        if col in categories:
+            df[col] = series.astype('category')
+        elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+            continue
+        elif series.isna().any() or len(series) == 0:
+            continue
+        elif pd.api.types.is_integer_dtype(series) or (series == np.floor(series)).all():
+            if int32.min <= series.min() and series.max() <= int32.max:
+                df[col] = series.astype(np.int32)
+
+    return df
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class _CacheState:
+    """One generation of cached datasets, tagged with the data version it was built from"""
+
+    def __init__(self, version: Optional[str] = None, entries: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.entries = entries if entries is not None else {}
+
+
+class _Entry:
+    def __init__(self, signature: Tuple, value: Any, paths, builder: Callable[[], Any]):
+        self.signature = signature
+        self.value = value
+        self.paths = paths
+        self.builder = builder
+
+
+# State a request (or a background rebuild) reads from - None means the live one
+_pinned: contextvars.ContextVar = contextvars.ContextVar('dataset_state', default=None)
+
+
+def _resolve_paths(paths) -> List[str]:
+    """Paths may be given as a list or as a callable returning one (for discovered files)"""
+    return list(paths() if callable(paths) else paths)
+
+
+class DatasetCache:
+    """
+    Parsed datasets keyed by name, kept until a source file's mtime/size changes
+
+    Each dataset is built at most once per source signature, even when several
+    threads ask for it at the same time.
+
+    While a DataWatcher runs, get() stops checking files on every call: the
+    watcher rebuilds changed datasets into a new state and swaps it in whole,
+    and requests inside pinned() keep reading the state they started on.
+    """
+
+    def __init__(self, source_dir: Optional[str] = None):
+        self.source_dir = source_dir
+        self.autocheck = True
+        self._state = _CacheState()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def _current(self) -> _CacheState:
+        return _pinned.get() or self._state
+
+    def _build_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(name, threading.Lock())
+
+    def _is_fresh(self, entry: Optional[_Entry], signature: Optional[Tuple]) -> bool:
+        if entry is None:
+            return False
+        return signature is None or entry.signature == signature
+
+    def get(self, name: str, paths, builder: Callable[[], Any]) -> Any:
+        """Return the cached dataset, rebuilding it if any source file changed"""
+        state = self._current()
+        signature = file_signature(_resolve_paths(paths)) if self.autocheck else None
+
+        entry = state.entries.get(name)
+        if self._is_fresh(entry, signature):
+            return read_only_view(entry.value)
+
+        with self._build_lock(name):
+            # Another thread may have rebuilt it while we waited
+            entry = state.entries.get(name)
+            if self._is_fresh(entry, signature):
+                return read_only_view(entry.value)
+
+            if signature is None:
+                signature = file_signature(_resolve_paths(paths))
+            value = builder()
+            state.entries[name] = _Entry(signature, value, paths, builder)
+            return read_only_view(value)
+
+    def is_current(self, name: str, paths) -> bool:
+        """True when the dataset is cached and its sources are unchanged"""
+        entry = self._current().entries.get(name)
+        if entry is None:
+            return False
+        return not self.autocheck or entry.signature == file_signature(_resolve_paths(paths))
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one dataset (or all of them) so the next get() re-parses"""
+        with self._lock:
+            if name is None:
+                self._state.entries.clear()
+            else:
+                self._state.entries.pop(name, None)
+
+    def names(self):
+        return list(self._current().entries.keys())
+
+    @property
+    def version(self) -> Optional[str]:
+        """Id of the data the current request reads - changes whenever a source file does"""
+        state = _pinned.get()
+        if state is not None:
+            return state.version
+        if self.autocheck:
+            return directory_version(self.source_dir) if self.source_dir else None
+        return self._state.version
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Read one consistent state for the duration of the block, even across a swap"""
+        if _pinned.get() is not None:
+            yield _pinned.get().version
+            return
+        state = self._state
+        if self.autocheck:
+            state = _CacheState(self.version, state.entries)
+        token = _pinned.set(state)
+        try:
+            yield state.version
+        finally:
+            _pinned.reset(token)
+
+    @staticmethod
+    def _lost_source(entry: _Entry, signature: Tuple) -> bool:
+        """True when a file the dataset was built from is still one of its sources but was deleted"""
+        existed = {path for path, mtime, _ in entry.signature if mtime is not None}
+        return any(mtime is None and path in existed for path, mtime, _ in signature)
+
+    def refresh(self, version: str) -> List[str]:
+        """
+        Rebuild datasets whose sources changed into a new state, then swap it
+        in with a single assignment. Unchanged datasets carry over as-is, and
+        sources given as a callable are re-resolved so added files count as a
+        change. Changed datasets whose source files were deleted are dropped,
+        not rebuilt - the datasets built from them re-resolve their sources.
+        If a builder raises, the live state is left untouched.
+        """
+        current = self._state
+        loaded = list(current.entries.items())
+        staged = _CacheState(version)
+        stale = []
+        for name, entry in loaded:
+            signature = file_signature(_resolve_paths(entry.paths))
+            if entry.signature == signature:
+                staged.entries[name] = entry
+            elif not self._lost_source(entry, signature):
+                stale.append((name, entry))
+
+        rebuilt = []
+        token = _pinned.set(staged)
+        try:
+            # Insertion order puts dependencies before the datasets built from them
+            for name, entry in stale:
+                if name not in staged.entries:
+                    self.get(name, entry.paths, entry.builder)
+                    rebuilt.append(name)
+        finally:
+            _pinned.reset(token)
+
+        with self._lock:
+            self._state = staged
+        return rebuilt
+
+
+# Shared by every tool in the process
+DATASETS = DatasetCache()
+
+
+class DataWatcher:
+    """
+    Background thread that polls a data directory and hot-swaps the cache
+    when files change. A change is applied once the directory has looked the
+    same for two polls in a row, so half-copied workbooks are not picked up.
+    """
+
+    def __init__(self, cache: DatasetCache, directory: str, interval: float = 30.0,
+                 before_refresh: Optional[Callable[[], Any]] = None):
+        self.cache = cache
+        self.directory = directory
+        self.interval = interval
+        self.before_refresh = before_refresh
+        self._applied: Tuple = ()
+        self._seen: Tuple = ()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._applied = self._seen = directory_signature(self.directory)
+        self.cache.autocheck = False
+        self.cache.refresh(signature_version(self._applied))
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.cache.autocheck = True
+
+    def poll(self) -> bool:
+        """Check the directory once, refreshing the cache if it changed and settled"""
+        signature = directory_signature(self.directory)
+        if signature == self._applied or signature != self._seen:
+            self._seen = signature
+            return False
+
+        if self.before_refresh is not None:
+            self.before_refresh()
+        rebuilt = self.cache.refresh(signature_version(signature))
+        self._applied = signature
+        print(f"Data reloaded (version {self.cache.version}): {', '.join(rebuilt) or 'nothing loaded yet'}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                # Keep serving the previous data; retried on the next poll
+                print(f"Data reload failed: {e}")
+
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of a (nested) argument value"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ResultCache:
+    """
+    Size-bounded LRU of tool results with a time-to-live per tool
+
+    Entries are keyed on (tool, arguments, data version), so a reload never
+    serves an answer computed on older files. Error results are not stored,
+    and hits are deep copies so callers can't alter the cached answer.
+    A TTL of 0 disables caching for that tool.
+
+    With verify, a hit for a call whose raw arguments differ from the key
+    is recomputed from them; a different payload is counted as a mismatch,
+    reported, and the fresh payload returned.
+    """
+
+    def __init__(self, max_entries: int = 512, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 3600.0, verify: bool = False):
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.verify = verify
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def ttl(self, tool: str) -> float:
+        return self.ttls.get(tool, self.default_ttl)
+
+    def _count(self, tool: str, outcome: str):
+        counts = self._counts.setdefault(tool, {'hits': 0, 'misses': 0})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def _verified(self, tool: str, args: Dict[str, Any], raw_args: Dict[str, Any],
+                  cached: Any, compute: Callable[[], Any]) -> Any:
+        """The cached payload, or compute()'s when it differs (a normalizer changed the answer)"""
+        fresh = compute()
+        if fresh == cached:
+            return cached
+        with self._lock:
+            self._count(tool, 'mismatches')
+        print(f"Result cache mismatch for {tool}: {raw_args!r} answered differently than {args!r}")
+        return fresh
+
+    def call(self, tool: str, args: Dict[str, Any], version: Any, compute: Callable[[], Any],
+             raw_args: Optional[Dict[str, Any]] = None) -> Any:
+        """Cached result of compute() for these arguments (normalized; raw_args as
+        the caller passed them, for verify) and data version"""
+        ttl = self.ttl(tool)
+        if ttl <= 0 or self.max_entries <= 0:
+            return compute()
+
+        key = (tool, _freeze(args), version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(tool, 'hits')
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                    entry = None
+                self._count(tool, 'misses')
+
+        if entry is not None:
+            cached = copy.deepcopy(entry[1])
+            if self.verify and raw_args is not None and any(args.get(k) != v for k, v in raw_args.items()):
+                return self._verified(tool, args, raw_args, cached, compute)
+            return cached
+
+        value = compute()
+        if isinstance(value, dict) and 'error' in value:
+            return value
+
+        with self._lock:
+            self._entries[key] = (now + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, overall and per tool"""
+        with self._lock:
+            by_tool = {tool: dict(counts) for tool, counts in sorted(self._counts.items())}
+            entries = len(self._entries)
+            evictions = self._evictions
+        hits = sum(counts['hits'] for counts in by_tool.values())
+        misses = sum(counts['misses'] for counts in by_tool.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "evictions": evictions,
+            "by_tool": by_tool,
+        }
+
+
+# ============================================================================
+# COLUMNAR SNAPSHOTS
+# ============================================================================
+
+# Parquet needs pyarrow; fall back to pickle (still typed, still fast) without it
+try:
+    import pyarrow  # noqa: F401
+    SNAPSHOT_FORMAT = 'parquet'
+except ImportError:
+    SNAPSHOT_FORMAT = 'pickle'
+
+# Bump when the loaders change what they store so old snapshots are ignored
+SNAPSHOT_SCHEMA = 5
+
+# Process umask, read once (setting it is the only way to read it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def snapshot_path(snapshot_dir: str, source: str) -> str:
+    """Snapshot file (without extension) for a source workbook"""
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(snapshot_dir, f"{name}.v{SNAPSHOT_SCHEMA}")
+
+
+def _existing_snapshot(base: str) -> Optional[str]:
+    for ext in ('.parquet', '.pkl'):
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def is_snapshot_fresh(snapshot_dir: str, source: str) -> bool:
+    """True when a snapshot exists and is at least as new as its source workbook"""
+    snap = _existing_snapshot(snapshot_path(snapshot_dir, source))
+    if snap is None or not os.path.exists(source):
+        return False
+    return os.stat(snap).st_mtime_ns >= os.stat(source).st_mtime_ns
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Settle object columns of only numbers or only dates (compacted frames have none left);
+    columns mixing in text still fail in arrow and are stored as pickle"""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if _is_mixed(df[col]):
+            df[col] = _settle_mixed(df[col])
+    return df
+
+
+def _write_file(path: str, write: Callable[[str], Any], mtime_ns: Optional[int] = None):
+    """
+    Write atomically: into a temp file of its own in the same directory, then
+    rename. Concurrent writers of one snapshot never share a temp file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        # mkstemp creates the file 0600 - give it the mode a plain open() would
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        write(tmp)
+        if mtime_ns is not None:
+            os.utime(tmp, ns=(mtime_ns, mtime_ns))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_snapshot(base: str, df: pd.DataFrame, mtime_ns: Optional[int] = None) -> str:
+    """Write atomically, stamped with mtime_ns, returning the snapshot path"""
+    if SNAPSHOT_FORMAT == 'parquet':
+        try:
+            safe = _arrow_safe(df)
+            _write_file(base + '.parquet', lambda tmp: safe.to_parquet(tmp, index=False), mtime_ns)
+            return base + '.parquet'
+        except Exception:
+            # Non-string headers and other arrow edge cases still round-trip via pickle
+            pass
+    _write_file(base + '.pkl', df.to_pickle, mtime_ns)
+    return base + '.pkl'
+
+
+def compile_snapshot(snapshot_dir: str, source: str,
+                     parse: Callable[[str], pd.DataFrame]) -> Tuple[pd.DataFrame, str]:
+    """
+    Parse a source workbook and store it as a columnar snapshot
+
+    The snapshot is stamped with the source's mtime from *before* parsing, so
+    a workbook overwritten mid-parse is still seen as newer than its snapshot.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    source_mtime_ns = os.stat(source).st_mtime_ns
+
+    df = parse(source)
+
+    base = snapshot_path(snapshot_dir, source)
+    path = _write_snapshot(base, df, source_mtime_ns)
+
+    # Only one format per source
+    for ext in ('.parquet', '.pkl'):
+        if base + ext != path:
+            # Another writer may have removed it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(base + ext)
+    return df, path
+
+
+def read_snapshot(snapshot_dir: str, source: str, allow_stale: bool = False) -> Optional[pd.DataFrame]:
+    """Load a source's snapshot if it is up to date (or at all, with allow_stale), else None"""
+    snap = _existing_snapshot(snapshot_path(snapshot_dir, source))
+    if snap is None or not (allow_stale or is_snapshot_fresh(snapshot_dir, source)):
+        return None
+    try:
+        if snap.endswith('.parquet'):
+            return pd.read_parquet(snap)
+        return pd.read_pickle(snap)
+    except Exception:
+        return None
+
+
+# ============================================================================
+# SHEET FINGERPRINTS (incremental ingestion)
+# ============================================================================
+
+_XLSX_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_XLSX_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _xlsx_part(target: str) -> str:
+    # Workbook relationship targets are relative to xl/ unless absolute
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join('xl', target))
+
+
+def _shared_strings(zf: zipfile.ZipFile, part: Optional[str]) -> List[str]:
+    if part is None or part not in zf.namelist():
+        return []
+    strings = []
+    with zf.open(part) as fh:
+        for _, elem in ElementTree.iterparse(fh):
+            if elem.tag == _XLSX_MAIN + 'si':
+                strings.append(''.join(t.text or '' for t in elem.iter(_XLSX_MAIN + 't')))
+                elem.clear()
+    return strings
+
+
+def _strings_digest(strings: List[str]) -> str:
+    return hashlib.sha1('\x00'.join(strings).encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def sheet_fingerprints(path: str) -> Tuple[Dict[str, List[int]], List[str]]:
+    """
+    ({sheet name: [CRC32, size] of its XML part}, shared strings) for an .xlsx,
+    in workbook order. Read from the zip directory - no cells are parsed.
+    """
+    with zipfile.ZipFile(path) as zf:
+        rels = {
+            rel.get('Id'): rel
+            for rel in ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels')).iter(_PACKAGE_REL + 'Relationship')
+        }
+        sheets = {}
+        for sheet in ElementTree.fromstring(zf.read('xl/workbook.xml')).iter(_XLSX_MAIN + 'sheet'):
+            rel = rels.get(sheet.get(_XLSX_REL + 'id'))
+            if rel is not None:
+                info = zf.getinfo(_xlsx_part(rel.get('Target')))
+                sheets[sheet.get('name')] = [info.CRC, info.file_size]
+
+        strings_part = next((_xlsx_part(rel.get('Target')) for rel in rels.values()
+                             if rel.get('Type', '').endswith('/sharedStrings')), None)
+        strings = _shared_strings(zf, strings_part)
+    return sheets, strings
+
+
+def stale_sheets(path: str, manifest: Optional[Dict[str, Any]]) -> Tuple[Optional[List[str]], Dict[str, Any]]:
+    """
+    (sheets changed or added since `manifest` was taken, new manifest)
+
+    Cells point into the shared string table by index, so an unchanged sheet
+    part only means unchanged content while the old table is a prefix of the
+    new one (strings appended, none edited). Otherwise - or without a usable
+    manifest - the first element is None: re-parse every sheet.
+    """
+    sheets, strings = sheet_fingerprints(path)
+    current = {'sheets': sheets, 'strings': len(strings), 'strings_digest': _strings_digest(strings)}
+    if not manifest:
+        return None, current
+
+    count = manifest.get('strings', -1)
+    if not 0 <= count <= len(strings) or _strings_digest(strings[:count]) != manifest.get('strings_digest'):
+        return None, current
+
+    previous = manifest.get('sheets', {})
+    return [name for name, fingerprint in sheets.items() if previous.get(name) != fingerprint], current
+
+
+# ============================================================================
+# STREAMING EXCEL READER
+# ============================================================================
+
+def _dedupe_header(header: List[Any]) -> List[Any]:
+    """Name blank headers 'Unnamed: i' and number repeats 'X.1', 'X.2' like pandas"""
+    names = [f"Unnamed: {i}" if value == '' else value for i, value in enumerate(header)]
+    counts: Dict[Any, int] = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _cell_value(cell) -> Any:
+    # Same conversion pandas applies to openpyxl cells
+    value = cell.value
+    if value is None:
+        return ''
+    if cell.data_type == 'e':
+        return np.nan
+    if cell.data_type == 'n':
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+def _row_bytes(values: List[Any]) -> int:
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+class StreamingExcelFile:
+    """
+    Stand-in for pd.ExcelFile (sheet_names, parse, context manager) that keeps
+    memory bounded on very large workbooks. Rows are read with openpyxl in
+    read-only mode and turned into typed frames one batch at a time, each
+    batch holding at most `memory_limit` bytes of raw cell values, instead of
+    materializing every row of the sheet as Python lists first.
+
+    Cells, headers and blank rows are handled as read_excel handles them, so
+    parse() returns the same frame pd.ExcelFile.parse would.
+    """
+
+    def __init__(self, path: str, memory_limit: int = 64 * 2**20):
+        from openpyxl import load_workbook
+
+        self.memory_limit = memory_limit
+        self._book = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self._book.sheetnames
+
+    def _sheet(self, sheet):
+        if isinstance(sheet, int):
+            return self._book.worksheets[sheet]
+        return self._book[sheet]
+
+    def iter_batches(self, sheet=0, usecols: Optional[Callable[[Any], bool]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Typed frames of consecutive rows, each built from at most memory_limit
+        bytes of cells. Columns holding text in a batch are left as object so
+        parse() can apply pandas' whole-column numeric conversion afterwards.
+        """
+        worksheet = self._sheet(sheet)
+        worksheet.reset_dimensions()
+
+        header = None
+        keep: List[int] = []
+        names: List[Any] = []
+        batch, text, buffered, blank, yielded = [], set(), 0, 0, False
+        for row in worksheet.rows:
+            width = len(row)
+            while width and (row[width - 1].value is None or row[width - 1].value == ''):
+                width -= 1
+
+            if header is None:
+                header = _dedupe_header([_cell_value(cell) for cell in row[:width]])
+                keep = [i for i, name in enumerate(header) if usecols is None or usecols(name)]
+                names = [header[i] for i in keep]
+                continue
+            if width == 0:
+                # Held back: blank rows only count if more data follows
+                blank += 1
+                continue
+
+            # Cells past the header row get 'Unnamed: i' columns, as in pandas
+            for i in range(len(header), width):
+                header.append(f"Unnamed: {i}")
+                if usecols is None or usecols(header[i]):
+                    keep.append(i)
+                    names.append(header[i])
+            if not keep:
+                continue
+
+            # pandas keeps blank rows between data rows unless the sheet is one column wide
+            if blank and len(header) > 1:
+                batch.extend([''] * len(keep) for _ in range(blank))
+            blank = 0
+
+            values = [_cell_value(row[i]) if i < len(row) else '' for i in keep]
+            for j, value in enumerate(values):
+                if value.__class__ is str and value != '':
+                    text.add(j)
+            batch.append(values)
+            buffered += _row_bytes(values)
+            if buffered >= self.memory_limit:
+                yield self._frame(batch, names, text)
+                batch, text, buffered, yielded = [], set(), 0, True
+
+        if batch:
+            yield self._frame(batch, names, text)
+        elif header is not None and not yielded:
+            # Header but no rows
+            yield pd.DataFrame(columns=names)
+
+    @staticmethod
+    def _frame(rows: List[List[Any]], names: List[Any], text: set) -> pd.DataFrame:
+        from pandas.io.parsers import TextParser
+
+        # Rows read before a wider row showed up are short - pad them
+        rows = [row + [''] * (len(names) - len(row)) if len(row) < len(names) else row for row in rows]
+        return TextParser(rows, names=list(names), header=None, skip_blank_lines=False,
+                          dtype={names[j]: object for j in text}).read()
+
+    def parse(self, sheet=0, usecols: Optional[Callable[[Any], bool]] = None) -> pd.DataFrame:
+        """The whole sheet as one frame, assembled from bounded batches"""
+        batches = list(self.iter_batches(sheet, usecols))
+        if not batches:
+            return pd.DataFrame()
+        df = pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+
+        # Like read_excel, text columns become numeric only if every value converts
+        for col in df.columns[(df.dtypes == object).to_numpy()]:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                df[col] = df[col].infer_objects()
+        return df
+
+    def close(self):
+        self._book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -45,26 +45,6 @@ WAREHOUSE_LOCATIONS = {
     }
 }
 
-# Historical cost rates ($/lb) from actual freight data
-COST_RATES = {
-    'Houston': {
-        'TX': 0.0277, 'LA': 0.0550, 'OK': 0.0700, 'AR': 0.0650, 'NM': 0.0850,
-        'MS': 0.0700, 'AL': 0.0850, 'TN': 0.0900, 'GA': 0.0950, 'FL': 0.1100,
-        'default': 0.0850
-    },
-    'West Memphis': {
-        'TN': 0.0350, 'AR': 0.0375, 'MS': 0.0400, 'AL': 0.0375, 'KY': 0.0450,
-        'IN': 0.0524, 'OH': 0.0673, 'IL': 0.0773, 'MO': 0.0550, 'VA': 0.0836,
-        'NC': 0.0800, 'GA': 0.0750, 'FL': 0.0900, 'TX': 0.1042, 'PA': 0.1001,
-        'default': 0.0925
-    },
-    'California': {
-        'CA': 0.0247, 'NV': 0.0450, 'AZ': 0.0645, 'OR': 0.0850, 'WA': 0.0900,
-        'UT': 0.0909, 'CO': 0.1000, 'ID': 0.1368, 'TX': 0.1520,
-        'default': 0.1200
-    }
-}
-
 # Edge case cities - where state-level routing is WRONG
 EDGE_CASES = {
     # Texas cities closer to other warehouses
@@ -129,9 +109,14 @@ def parse_destination(destination: str) -> Tuple[str, str, str]:
 
 def get_state_based_cost(warehouse: str, state: str, weight_lbs: float) -> Dict[str, Any]:
     """Calculate cost using historical state-level data"""
-    state = state.upper()
-    rates = COST_RATES.get(warehouse, COST_RATES['West Memphis'])
-    rate = rates.get(state, rates['default'])
+    # Lane rates come from the freight workbooks loaded by tools (imported here, as tools imports this module)
+    try:
+        from tools import get_cost_rate, lane_rate
+    except ImportError:
+        from .tools import get_cost_rate, lane_rate
+
+    quote = lane_rate(warehouse, state)
+    rate = round(get_cost_rate(warehouse, state), 4)
     cost = weight_lbs * rate
 
     return {
@@ -140,7 +125,7 @@ def get_state_based_cost(warehouse: str, state: str, weight_lbs: float) -> Dict[
         'estimated_cost': round(cost, 2),
         'cost_per_pallet': round(920 * rate, 2),
         'data_source': 'historical_freight_2025',
-        'confidence': 'HIGH' if state in rates else 'MEDIUM'
+        'confidence': 'HIGH' if quote['source'] != 'default' else 'MEDIUM'
     }
 
 
@@ -0,0 +1,351 @@
+"""
+Alpha Prophet Search Indexes
+In-memory lookup structures built once per dataset version
+"""
+
+import re
+import difflib
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional, Tuple
+
+# Characters that make a str.contains pattern more than a literal substring
+_REGEX_META = set('.^$*+?{}[]\\|()')
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r'[A-Z0-9]+', str(text).upper())
+
+
+class TrigramIndex:
+    """
+    Trigram inverted index over the distinct values of a text column
+
+    Built on a categorical's categories, so a search touches each distinct
+    value at most once and maps back to rows through the category codes.
+    Results are exactly those of the str.contains call they replace: the
+    index only narrows the candidates, every candidate is still checked.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        self.values = pd.Index(values)
+        self._upper = [str(value).upper() for value in self.values]
+        self._ascii = np.array([str(value).isascii() for value in self.values], dtype=bool)
+
+        postings = {}
+        for i, text in enumerate(self._upper):
+            for gram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _candidates(self, needle: str) -> np.ndarray:
+        """Values containing every trigram of the (uppercased) needle"""
+        grams = {needle[j:j + 3] for j in range(len(needle) - 2)}
+        ids = None
+        # Rarest trigram first keeps the intersections small
+        for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return np.empty(0, dtype=np.int32)
+            ids = posting if ids is None else np.intersect1d(ids, posting, assume_unique=True)
+            if len(ids) == 0:
+                break
+        return ids
+
+    def _scan(self, ids: np.ndarray, query: str, ignore_case: bool) -> np.ndarray:
+        # The original pandas expression over the given values only - as object,
+        # like str methods on a categorical, so patterns go through Python's re
+        values = pd.Series(self.values[ids], dtype=object)
+        with warnings.catch_warnings():
+            # Only the match flags are used, so groups in a pattern don't matter
+            warnings.filterwarnings('ignore', message='This pattern is interpreted as a regular expression')
+            if ignore_case:
+                return values.str.contains(query, case=False, na=False).to_numpy(dtype=bool)
+            return values.str.upper().str.contains(query.upper(), na=False).to_numpy(dtype=bool)
+
+    def value_hits(self, query: str, ignore_case: bool = False) -> np.ndarray:
+        """
+        Match flag per distinct value, plus a trailing False for missing values
+
+        ignore_case=False mirrors s.str.upper().str.contains(query.upper());
+        ignore_case=True mirrors s.str.contains(query, case=False).
+        """
+        hits = np.zeros(len(self.values) + 1, dtype=bool)
+        needle = query.upper()
+        literal = not (_REGEX_META & set(query))
+
+        if not literal or len(needle) < 3 or (ignore_case and not needle.isascii()):
+            # Regex, too short for a trigram, or non-ASCII case folding - check every value
+            ids = np.arange(len(self.values))
+            hits[ids] = self._scan(ids, query, ignore_case)
+            return hits
+
+        ids = self._candidates(needle)
+        if ignore_case:
+            # Unicode case folding can match ASCII text (e.g. the Kelvin sign) - verify those with re
+            folded = np.flatnonzero(~self._ascii)
+            if len(folded):
+                hits[folded] = self._scan(folded, query, ignore_case)
+            ids = ids[self._ascii[ids]]
+        upper = self._upper
+        hits[ids] = [needle in upper[i] for i in ids]
+        return hits
+
+    def mask(self, series: pd.Series, query: str, ignore_case: bool = False) -> np.ndarray:
+        """Row mask for a categorical column whose categories this index was built on"""
+        categories = series.cat.categories
+        if categories is not self.values and not categories.equals(self.values):
+            return TrigramIndex(categories).mask(series, query, ignore_case)
+        return self.value_hits(query, ignore_case)[series.cat.codes.to_numpy()]
+
+
+class DateIndex:
+    """
+    Row positions of a datetime column, sorted by date
+
+    A date range becomes two binary searches and a slice instead of a
+    comparison over every row. Missing dates are left out, as they never
+    fall inside a range.
+    """
+
+    def __init__(self, dates: pd.Series):
+        values = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+        rows = np.flatnonzero(~np.isnat(values))
+        order = np.argsort(values[rows], kind='stable')
+        self.rows = rows[order]
+        self.dates = values[rows][order]
+        self.size = len(values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def between(self, start, end) -> np.ndarray:
+        """Positions of the rows with start <= date <= end, in row order"""
+        lo = np.searchsorted(self.dates, np.datetime64(start, 'ns'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(end, 'ns'), side='right')
+        return np.sort(self.rows[lo:hi])
+
+    def select(self, df: pd.DataFrame, start, end) -> pd.DataFrame:
+        """
+        Rows of df dated start..end, in df's order
+
+        df is the indexed frame or a row subset of it that still carries its
+        original RangeIndex labels, i.e. a slice or the result of earlier filters.
+        """
+        rows = self.between(start, end)
+        if len(df) == self.size:
+            return df.iloc[rows]
+        index = df.index
+        if isinstance(index, pd.RangeIndex) and index.step == 1:
+            # A contiguous block (e.g. one partition): keep the positions inside it
+            rows = rows[(rows >= index.start) & (rows < index.stop)]
+            return df.iloc[rows - index.start]
+        return df[np.isin(df.index.to_numpy(), rows, assume_unique=True)]
+
+
+class DestinationIndex:
+    """
+    Freight destinations ("Customer-City ST") split into the fields
+    search_freight matches on: customer, city/state and 2-letter state
+
+    Every matching strategy is evaluated once over the distinct destinations
+    and mapped back to rows through the codes, instead of a column scan per
+    strategy tried.
+    """
+
+    def __init__(self, destinations: pd.Series):
+        codes, values = pd.factorize(destinations.fillna('').astype(str))
+        self.codes = codes
+        values = pd.Series(values, dtype=object)
+        self.values = pd.Index(values)
+        self.state = values.str.strip().str[-2:].str.upper().to_numpy()
+        self._destination = TrigramIndex(values)
+        self._customer = TrigramIndex(values.str.split('-').str[0].str.strip())
+        self._city = TrigramIndex(values.str.split('-').str[-1].str.strip())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @staticmethod
+    def _contains(index: TrigramIndex, query: str) -> np.ndarray:
+        return index.value_hits(query)[:-1]
+
+    def match(self, query: str, rows: np.ndarray) -> Optional[Tuple[str, Tuple[str, ...], np.ndarray]]:
+        """
+        Best-ranked match for a destination query among the given rows, as
+        (match_type, terms, row mask), or None if nothing matches
+
+        Ranking, first one with a hit wins:
+          2 characters:       state
+          "Customer-Location": exact, customer_location, customer, location
+          otherwise:          customer_contains, destination, city, partial
+        A state query always matches, even when the mask is empty.
+        """
+        query = query.upper().strip()
+        row_codes = self.codes[rows]
+        present = np.zeros(len(self.values), dtype=bool)
+        present[row_codes] = True
+
+        def found(hits):
+            return bool((hits & present).any())
+
+        def result(match_type, terms, hits):
+            return match_type, terms, hits[row_codes]
+
+        if len(query) == 2:
+            return result('state', (query,), self.state == query)
+
+        if '-' in query:
+            parts = query.split('-')
+            customer = parts[0].strip()
+            location = '-'.join(parts[1:]).strip()
+
+            exact = self._contains(self._destination, query)
+            if found(exact):
+                return result('exact', (query,), exact)
+
+            by_customer = self._contains(self._customer, customer)
+            if found(by_customer):
+                located = by_customer & self._contains(self._city, location.replace(' ', ''))
+                if found(located):
+                    return result('customer_location', (customer, location), located)
+                return result('customer', (customer, location), by_customer)
+
+            by_location = self._contains(self._destination, location)
+            if found(by_location):
+                return result('location', (customer, location), by_location)
+            return None
+
+        for match_type, index in (('customer_contains', self._customer),
+                                  ('destination', self._destination),
+                                  ('city', self._city)):
+            hits = self._contains(index, query)
+            if found(hits):
+                return result(match_type, (query,), hits)
+
+        for word in query.split():
+            if len(word) >= 3:
+                hits = self._contains(self._destination, word)
+                if found(hits):
+                    return result('partial', (word,), hits)
+        return None
+
+
+class SuggestionIndex:
+    """
+    "Did you mean" lookup over a set of names (destinations, customers, products)
+
+    Candidates are the names sharing trigrams with the query's words; only
+    those are scored, word against word, with difflib's similarity ratio.
+    A miss costs a few posting lookups plus a short candidate list, not a
+    pass over every name.
+    """
+
+    def __init__(self, names: Iterable[str], max_candidates: int = 200):
+        self.names = list(dict.fromkeys(str(name) for name in names if str(name).strip()))
+        self.max_candidates = max_candidates
+        self._upper = [name.upper() for name in self.names]
+        self._words = [_words(name) for name in self.names]
+
+        postings = {}
+        for i, words in enumerate(self._words):
+            for gram in self._grams(words):
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _grams(words: List[str]) -> set:
+        # Space-padded so short words ("147" vs "146") still share a trigram
+        return {f" {word} "[j:j + 3] for word in words for j in range(len(word))}
+
+    def _score(self, i: int, text: str, words: List[str]) -> float:
+        """
+        Mean over the query words of their best match in the name (1.0 when
+        contained), blended with whole-string similarity to break ties
+        """
+        total = 0.0
+        for word in words:
+            if word in self._upper[i]:
+                total += 1.0
+            else:
+                total += max((difflib.SequenceMatcher(None, word, other).ratio() for other in self._words[i]), default=0.0)
+        whole = difflib.SequenceMatcher(None, text, self._upper[i]).ratio()
+        return 0.75 * total / len(words) + 0.25 * whole
+
+    def suggest(self, query: str, limit: int = 5, min_score: float = 0.6) -> List[Tuple[str, float]]:
+        """Up to limit (name, score) pairs, best first, scoring at least min_score"""
+        words = [word for word in _words(query) if len(word) >= 3]
+        if not words or not self.names:
+            return []
+
+        votes = np.zeros(len(self.names), dtype=np.int32)
+        for gram in self._grams(words):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                votes[posting] += 1
+
+        candidates = np.flatnonzero(votes)
+        if len(candidates) > self.max_candidates:
+            # Most shared trigrams first
+            candidates = candidates[np.argsort(-votes[candidates], kind='stable')[:self.max_candidates]]
+
+        text = str(query).upper().strip()
+        scored = [(self.names[i], self._score(i, text, words)) for i in candidates]
+        scored = [(name, score) for name, score in scored if score >= min_score]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return [(name, round(score, 2)) for name, score in scored[:limit]]
+
+
+class PartitionIndex:
+    """
+    Row ranges of a frame per value of a key column (e.g. freight rows per warehouse)
+
+    Frames built by concatenating one partition after another keep each
+    key in a single contiguous run, so selecting a partition, or adjacent
+    ones, is a positional slice - a view, not a copy. Anything else is
+    gathered from the selected runs only, never by a scan of the key column.
+    """
+
+    def __init__(self, keys: pd.Series):
+        codes, uniques = pd.factorize(keys)
+        self.size = len(codes)
+        self.names = [str(name) for name in uniques]
+
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if self.size else np.empty(0, dtype=np.int64)
+        stops = np.r_[starts[1:], self.size]
+        self.runs = {name: [] for name in self.names}
+        for start, stop in zip(starts, stops):
+            if codes[start] >= 0:
+                self.runs[self.names[codes[start]]].append((int(start), int(stop)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def count(self, name: str) -> int:
+        return sum(stop - start for start, stop in self.runs.get(name, ()))
+
+    def rows(self, names: Iterable[str]):
+        """Positions of the given partitions' rows, in row order: a slice when they are contiguous"""
+        runs = sorted(run for name in dict.fromkeys(names) for run in self.runs.get(name, ()))
+        merged = []
+        for start, stop in runs:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], stop)
+            else:
+                merged.append((start, stop))
+        if not merged:
+            return slice(0, 0)
+        if len(merged) == 1:
+            return slice(*merged[0])
+        return np.concatenate([np.arange(start, stop) for start, stop in merged])
+
+    def select(self, df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+        """Rows of the given partitions of df, the frame this index was built on"""
+        return df.iloc[self.rows(names)]
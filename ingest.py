@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Alpha Prophet Data Ingestion
+Compiles the Excel exports in data/ into columnar snapshots
+
+Usage:
+    python ingest.py           # Refresh stale snapshots only
+    python ingest.py --force   # Rebuild every snapshot
+    python ingest.py --memory  # Report memory saved by the loading profile
+"""
+
+import argparse
+
+from tools import SNAPSHOT_DIR, build_snapshots, profile_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile Excel sources into columnar snapshots")
+    parser.add_argument("--force", action="store_true", help="Rebuild snapshots even if they are up to date")
+    parser.add_argument("--memory", action="store_true", help="Report memory saved by the loading profile")
+    args = parser.parse_args()
+
+    if args.memory:
+        for name, info in profile_memory().items():
+            if "error" in info:
+                print(f"  {name}: ERROR {info['error']}")
+            else:
+                print(f"  {name}: {info['full_mb']} MB -> {info['profiled_mb']} MB ({info['saved_pct']}% saved)")
+        return
+
+    print(f"Snapshot directory: {SNAPSHOT_DIR}")
+    report = build_snapshots(force=args.force)
+
+    for name, info in report.items():
+        status = info["status"]
+        if status == "written":
+            print(f"  {name}: {info['rows']} rows -> {info['snapshot']} ({info['seconds']}s)")
+        elif status == "error":
+            print(f"  {name}: ERROR {info['error']}")
+        else:
+            print(f"  {name}: {status}")
+
+
+if __name__ == "__main__":
+    main()
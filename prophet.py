@@ -139,7 +139,7 @@ When asked "what happened on X date":
 - For older dates: Use search_orders
 - Always tell user which data source you used
 
-TOOLS: get_distribution, analyze_state, get_warehouse_info, get_backlog_summary, compare_routing, forecast_demand, recommend_east_coast_location, search_orders, search_freight
+TOOLS: get_distribution, get_distribution_batch, analyze_state, get_warehouse_info, get_backlog_summary, compare_routing, forecast_demand, recommend_east_coast_location, search_orders, search_freight
 
 If a tool returns data, summarize it cleanly. Don't repeat the raw JSON."""
 
@@ -0,0 +1,375 @@
+"""
+Alpha Prophet Lane Rates
+Freight $/lb per lane (warehouse, destination state, transport type), derived from the freight facts
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional
+
+TRANSPORT_TYPES = ['Closed', 'Flatbed', 'LTL', 'Hot Shot']
+_TRANSPORT_KEYS = {name.upper(): name for name in TRANSPORT_TYPES}
+
+
+def transport_type(value) -> Optional[str]:
+    """Canonical transport type: known types matched case-insensitively ('CLosed' -> 'Closed'),
+    anything else title-cased, None when missing"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    text = ' '.join(str(value).split())
+    if not text:
+        return None
+    return _TRANSPORT_KEYS.get(text.upper(), text.title())
+
+
+def _stats(rates: pd.Series, cost: pd.Series, weight: pd.Series, keys: list) -> pd.DataFrame:
+    """Weighted mean, median, p90 and count of the per-shipment $/lb, per key"""
+    frame = pd.DataFrame({'per_lb': rates, 'cost': cost, 'weight': weight})
+    grouped = frame.groupby(keys, observed=True, sort=True)
+    return pd.DataFrame({
+        'rate': grouped['cost'].sum() / grouped['weight'].sum(),
+        'median': grouped['per_lb'].median(),
+        'p90': grouped['per_lb'].quantile(0.9),
+        'shipments': grouped['per_lb'].size(),
+    })
+
+
+class LaneRates:
+    """
+    $/lb per lane from the shipments actually paid for
+
+    The table holds, for every observed (warehouse, state, transport) lane,
+    the weight-weighted mean rate (total cost / total weight), the median and
+    90th percentile of the per-shipment rate, and the number of shipments;
+    transport '' is the lane over all transport types and state '' the
+    warehouse over all states. A rate is served from the most specific of
+    those with at least min_shipments shipments. Lanes the data doesn't
+    cover fall back to the reference rates, then to the warehouse average,
+    and transport types without a lane of their own to the modifiers.
+    """
+
+    def __init__(self, facts: pd.DataFrame, reference: Dict[str, Dict[str, float]],
+                 modifiers: Dict[str, float], default_warehouse: str, min_shipments: int = 5):
+        self.reference = reference
+        self.modifiers = modifiers
+        self.default_warehouse = default_warehouse
+        self.min_shipments = min_shipments
+
+        if len(facts):
+            paid = facts[(facts['weight'] > 0) & (facts['cost'] > 0)]
+        else:
+            paid = pd.DataFrame(columns=['warehouse', 'state', 'transport', 'weight', 'cost'])
+        warehouse = paid['warehouse'].astype(object)
+        state = paid['state'].astype(object).fillna('')
+        transport = paid['transport'].astype(object).fillna('')
+        cost = paid['cost'].astype(float)
+        weight = paid['weight'].astype(float)
+        per_lb = cost / weight
+
+        everywhere = pd.Series('', index=paid.index, dtype=object)
+        # A lane needs a state; the warehouse rows count every paid shipment
+        located = state != ''
+        tables = [
+            _stats(per_lb[located], cost[located], weight[located],
+                   [warehouse[located].rename('warehouse'), state[located].rename('state'), transport[located].rename('transport')]),
+            _stats(per_lb[located], cost[located], weight[located],
+                   [warehouse[located].rename('warehouse'), state[located].rename('state'), everywhere[located].rename('transport')]),
+            _stats(per_lb, cost, weight,
+                   [warehouse.rename('warehouse'), everywhere.rename('state'), everywhere.rename('transport')]),
+        ]
+        self.table = pd.concat(tables).sort_index()
+        self.overall = float(cost.sum() / weight.sum()) if weight.sum() > 0 else None
+
+        self._lanes = {
+            key: row for key, row in zip(
+                self.table.index,
+                self.table[['rate', 'median', 'p90', 'shipments']].itertuples(index=False, name=None)
+            )
+        }
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def warehouses(self) -> list:
+        """Warehouses with a rate: the reference ones plus any the data adds"""
+        observed = self.table.index.get_level_values('warehouse')
+        return list(dict.fromkeys(list(self.reference) + list(observed)))
+
+    def _lane(self, warehouse: str, state: str, transport: str) -> Optional[tuple]:
+        lane = self._lanes.get((warehouse, state, transport))
+        if lane is not None and lane[3] >= self.min_shipments:
+            return lane
+        return None
+
+    def quote(self, warehouse: str, state: str, transport: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rate for one lane, with the statistics it came from
+
+        source is 'lane' (the warehouse's shipments to the state by this
+        transport type), 'state' (to the state, any transport type),
+        'reference' (reference rate for the state) or 'default'
+        (warehouse average); modifier is the transport factor applied on top.
+        """
+        if warehouse not in self.reference and (warehouse, '', '') not in self._lanes:
+            warehouse = self.default_warehouse
+        transport = transport_type(transport)
+        reference = self.reference.get(warehouse, {})
+
+        lane = self._lane(warehouse, state, transport) if transport else None
+        if lane is not None:
+            source, modifier = 'lane', 1.0
+        else:
+            modifier = self.modifiers.get(transport, 1.0) if transport else 1.0
+            lane = self._lane(warehouse, state, '')
+            if lane is not None:
+                source = 'state'
+            elif state in reference and state != 'default':
+                source, lane = 'reference', (reference[state], None, None, 0)
+            else:
+                source = 'default'
+                lane = self._lane(warehouse, '', '')
+                if lane is None:
+                    lane = (reference.get('default', self.overall or 0.0), None, None, 0)
+
+        rate, median, p90, shipments = lane
+        return {
+            'warehouse': warehouse,
+            'state': state,
+            'transport': transport,
+            'rate': float(rate) * modifier,
+            'base_rate': float(rate),
+            'modifier': modifier,
+            'median': None if median is None else float(median) * modifier,
+            'p90': None if p90 is None else float(p90) * modifier,
+            'shipments': int(shipments),
+            'source': source,
+        }
+
+    def rate(self, warehouse: str, state: str, transport: Optional[str] = None) -> float:
+        """$/lb for one lane"""
+        return self.quote(warehouse, state, transport)['rate']
+
+
+class RateMatrix:
+    """
+    Lane rates as a dense (warehouse x state x transport type) array
+
+    Every cell is LaneRates.rate for that lane, so a bulk quote is one
+    fancy-indexing gather and a multiply instead of a rate lookup per
+    shipment and warehouse. The last state slot holds the rate for states
+    without one of their own, transport slot 0 the rate when no (or an
+    unknown) transport type is given.
+    """
+
+    def __init__(self, lanes: LaneRates, warehouses: Iterable[str], states: Iterable[str]):
+        self.warehouses = list(warehouses)
+        self.default_warehouse = lanes.default_warehouse
+        self.states = pd.Index(list(dict.fromkeys(states)), dtype=object)
+        observed = [t for t in lanes.table.index.get_level_values('transport').unique() if t]
+        self.transports = pd.Index(list(dict.fromkeys(TRANSPORT_TYPES + observed)), dtype=object)
+
+        self.rates = np.array([
+            [
+                [lanes.rate(warehouse, state, transport) for transport in [None] + list(self.transports)]
+                for state in list(self.states) + [None]
+            ]
+            for warehouse in self.warehouses
+        ], dtype=float)
+
+    def rate(self, warehouse: str, state: str, transport: Optional[str] = None) -> float:
+        """$/lb in one cell; other warehouses are priced as the default one, like LaneRates.quote"""
+        if warehouse not in self.warehouses:
+            warehouse = self.default_warehouse
+        transport = transport_type(transport)
+        return float(self.rates[self.warehouses.index(warehouse), self.state_ids([state])[0],
+                                self.transport_ids([transport])[0] if transport else 0])
+
+    def state_ids(self, states) -> np.ndarray:
+        """State slot per value (canonical 2-letter codes); unknown states get the last slot"""
+        ids = self.states.get_indexer(pd.Index(states, dtype=object))
+        ids[ids < 0] = len(self.states)
+        return ids
+
+    def transport_ids(self, transports) -> np.ndarray:
+        """Transport slot per value (transport_type names); none or unknown get slot 0"""
+        return self.transports.get_indexer(pd.Index(transports, dtype=object)) + 1
+
+    def costs(self, states, weights, transports=None) -> np.ndarray:
+        """
+        Cost of every shipment from every warehouse, shape (shipments, warehouses)
+
+        states and transports are canonical (2-letter codes, transport_type
+        names); weights are lbs.
+        """
+        state_ids = self.state_ids(states)
+        if transports is None:
+            transport_ids = np.zeros(len(state_ids), dtype=np.int64)
+        else:
+            transport_ids = self.transport_ids(transports)
+        return self.rates[:, state_ids, transport_ids].T * np.asarray(weights, dtype=float)[:, None]
+
+
+def _totals(shipments: np.ndarray, weight: np.ndarray, actual: np.ndarray,
+            modeled: np.ndarray, counterfactual: np.ndarray) -> Dict[str, Any]:
+    return {
+        'shipments': int(shipments),
+        'weight_lbs': int(round(weight)),
+        'actual_cost': round(float(actual), 2),
+        'modeled_cost': round(float(modeled), 2),
+        'counterfactual_cost': round(float(counterfactual), 2),
+        'savings': round(float(actual - counterfactual), 2),
+    }
+
+
+class CounterfactualEngine:
+    """
+    Historical freight shipments re-priced under alternative policies
+
+    A policy is a mask of the shipments it changes and the $/lb they would
+    pay instead. Only shipments with a recorded cost are re-priced, and
+    savings are what was actually paid minus the counterfactual cost; the
+    cost modeled from each shipment's own lane in the rate matrix is
+    reported alongside. All policies are priced together as one
+    (policies x shipments) array and summed per warehouse, ship month and
+    lane with bincount.
+    """
+
+    def __init__(self, facts: pd.DataFrame, matrix: RateMatrix):
+        self.matrix = matrix
+        if len(facts):
+            shipments = facts[(facts['weight'] > 0) & facts['warehouse'].isin(matrix.warehouses)]
+        else:
+            shipments = pd.DataFrame(columns=['warehouse', 'state', 'transport', 'destination', 'ship_date', 'weight', 'cost'])
+        self.size = len(shipments)
+
+        self.warehouse = shipments['warehouse'].astype(object).to_numpy()
+        self.state = shipments['state'].astype(object).fillna('').to_numpy()
+        self.transport = shipments['transport'].astype(object).fillna('').to_numpy()
+        self.destination = shipments['destination'].astype(object).to_numpy()
+        self.ship_date = pd.to_datetime(shipments['ship_date']).to_numpy(dtype='datetime64[ns]')
+        self.month = pd.Series(self.ship_date).dt.strftime('%Y-%m').fillna('unknown').to_numpy(dtype=object)
+        self.weight = shipments['weight'].to_numpy(dtype=float)
+        self.cost = shipments['cost'].to_numpy(dtype=float)
+
+        self.warehouse_ids = pd.Index(matrix.warehouses).get_indexer(pd.Index(self.warehouse, dtype=object))
+        self.state_ids = matrix.state_ids(self.state)
+        self.transport_ids = matrix.transport_ids(self.transport)
+        self.modeled = matrix.rates[self.warehouse_ids, self.state_ids, self.transport_ids] * self.weight
+
+    def __len__(self) -> int:
+        return self.size
+
+    def rates_from(self, warehouse: Optional[str] = None, transport: Optional[str] = None) -> np.ndarray:
+        """$/lb each shipment would pay from warehouse (its own unless given) by
+        transport: the matrix cell a single quote for that lane reads, the
+        no-transport cell when none is given"""
+        warehouse_ids = self.warehouse_ids if warehouse is None else self.matrix.warehouses.index(warehouse)
+        transport_id = self.matrix.transport_ids([transport])[0] if transport else 0
+        return self.matrix.rates[warehouse_ids, self.state_ids, transport_id]
+
+    def actual_rate(self, mask: np.ndarray) -> Optional[float]:
+        """Recorded $/lb (total cost / total weight) of the paid shipments in mask"""
+        paid = mask & (self.cost > 0)
+        weight = self.weight[paid].sum()
+        return float(self.cost[paid].sum() / weight) if weight > 0 else None
+
+    def consolidation_groups(self, transport: str = 'LTL', window_days: int = 2) -> np.ndarray:
+        """
+        Group id per shipment of the shipments by transport that could have
+        ridden together: same warehouse and destination, each within
+        window_days of the previous one. -1 for shipments in no group.
+        """
+        candidates = np.flatnonzero(self.transport == transport)
+        groups_by_row = np.full(self.size, -1, dtype=np.int64)
+        if len(candidates) < 2:
+            return groups_by_row
+
+        dates = self.ship_date[candidates]
+        keys = pd.factorize(pd.Series(self.warehouse[candidates] + '|' + self.destination[candidates].astype(str)))[0]
+        order = np.lexsort((dates, keys))
+        dates, keys = dates[order], keys[order]
+
+        gap = np.diff(dates).astype('timedelta64[D]').astype(np.int64)
+        undated = np.isnat(dates)
+        joins = (keys[1:] == keys[:-1]) & ~undated[1:] & ~undated[:-1] & (gap <= window_days)
+        groups = np.cumsum(np.r_[True, ~joins])
+        sizes = np.bincount(groups)
+        groups_by_row[candidates[order]] = np.where(sizes[groups] >= 2, groups, -1)
+        return groups_by_row
+
+    def consolidation_mask(self, transport: str = 'LTL', window_days: int = 2) -> np.ndarray:
+        """Shipments in any consolidation_groups group"""
+        return self.consolidation_groups(transport, window_days) >= 0
+
+    def median_group(self, groups: np.ndarray, rates) -> Optional[Dict[str, Any]]:
+        """
+        The group (by id per shipment, -1 for none) whose paid shipments have
+        the median total weight, priced as paid and at rates ($/lb per
+        shipment) - a worked example drawn from the shipments a policy moves
+        """
+        paid = (groups >= 0) & (self.cost > 0)
+        if not paid.any():
+            return None
+        codes, _ = pd.factorize(groups[paid])
+        weights = np.bincount(codes, weights=self.weight[paid])
+        median = np.argsort(weights, kind='stable')[(len(weights) - 1) // 2]
+        rows = np.flatnonzero(paid)[codes == median]
+        counterfactual = np.broadcast_to(rates, self.size)[rows] * self.weight[rows]
+        return {
+            'warehouse': self.warehouse[rows[0]],
+            'destination': str(self.destination[rows[0]]),
+            **_totals(len(rows), self.weight[rows].sum(), self.cost[rows].sum(),
+                      self.modeled[rows].sum(), counterfactual.sum()),
+        }
+
+    def _breakdown(self, keys: np.ndarray, masks: np.ndarray, costs: np.ndarray, top_n: Optional[int]) -> list:
+        codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+        width = len(uniques)
+        rows = []
+        for mask, cost in zip(masks, costs):
+            ids = codes[mask]
+            sums = [np.bincount(ids, weights=values[mask], minlength=width)
+                    for values in (np.ones(self.size), self.weight, self.cost, self.modeled, cost)]
+            groups = [
+                {'key': uniques[i], **_totals(*(column[i] for column in sums))}
+                for i in np.flatnonzero(sums[0])
+            ]
+            groups.sort(key=lambda group: (-group['savings'], group['key']))
+            rows.append(groups[:top_n] if top_n else groups)
+        return rows
+
+    def evaluate(self, policies: Dict[str, tuple], top_n: int = 5) -> Dict[str, Dict[str, Any]]:
+        """
+        Actual, modeled and counterfactual cost of each policy's shipments
+
+        policies maps a name to (mask, $/lb per shipment); shipments outside
+        the mask, or without a recorded cost, keep what they paid. Each
+        result has the totals plus by_warehouse, by_month (chronological)
+        and the top_n lanes by savings.
+        """
+        names = list(policies)
+        if not names:
+            return {}
+        masks = np.array([np.asarray(policies[name][0], dtype=bool) for name in names]).reshape(len(names), self.size)
+        # Savings are measured against what was paid, so unpaid shipments can't take part
+        masks &= self.cost > 0
+        rates = np.array([np.broadcast_to(policies[name][1], self.size) for name in names], dtype=float).reshape(len(names), self.size)
+        # Every policy's shipments re-priced in one pass
+        counterfactual = np.where(masks, rates * self.weight, self.cost)
+
+        lanes = self.warehouse + ' → ' + self.state
+        by_warehouse = self._breakdown(self.warehouse, masks, counterfactual, None)
+        by_month = self._breakdown(self.month, masks, counterfactual, None)
+        by_lane = self._breakdown(lanes, masks, counterfactual, top_n)
+
+        results = {}
+        for p, name in enumerate(names):
+            mask = masks[p]
+            results[name] = {
+                **_totals(mask.sum(), self.weight[mask].sum(), self.cost[mask].sum(),
+                          self.modeled[mask].sum(), counterfactual[p][mask].sum()),
+                'by_warehouse': by_warehouse[p],
+                'by_month': sorted(by_month[p], key=lambda group: group['key']),
+                'top_lanes': by_lane[p],
+            }
+        return results
@@ -0,0 +1,72 @@
+"""
+Alpha Prophet Routing
+State (and optional city) to warehouse rules, applied to whole columns
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+
+def _keys(values) -> np.ndarray:
+    """Uppercased, stripped lookup keys (missing values become 'NONE', like str(None))"""
+    return np.array([str(value).upper().strip() for value in values], dtype=object)
+
+
+def _codes(values: pd.Series) -> Tuple[np.ndarray, list]:
+    """Distinct values and a code per row; missing values get the code one past the end"""
+    codes, uniques = pd.factorize(values)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = len(uniques)
+    return codes, list(uniques)
+
+
+class RoutingTable:
+    """
+    Warehouse assignment rules as a lookup table
+
+    States are matched uppercased and stripped, by name or abbreviation;
+    anything unlisted goes to the default warehouse. City overrides,
+    (city, state) pairs served differently from the rest of their state,
+    win when a city column is given. Columns are routed through their
+    distinct values, so each rule runs once per distinct state, not per row.
+    """
+
+    def __init__(self, states: Dict[str, str], default: str,
+                 city_overrides: Optional[Dict[Tuple[str, str], str]] = None):
+        self.states = {key.upper().strip(): warehouse for key, warehouse in states.items()}
+        self.default = default
+        self.city_overrides = {
+            (city.upper().strip(), state.upper().strip()): warehouse
+            for (city, state), warehouse in (city_overrides or {}).items()
+        }
+
+    def warehouse(self, state, city=None) -> str:
+        """Warehouse for one destination"""
+        state_key = str(state).upper().strip()
+        if city is not None and self.city_overrides:
+            override = self.city_overrides.get((str(city).upper().strip(), state_key))
+            if override is not None:
+                return override
+        return self.states.get(state_key, self.default)
+
+    def route(self, states: pd.Series, cities: Optional[pd.Series] = None) -> pd.Series:
+        """Warehouse for every row of a state column (and optional city column), in one pass"""
+        state_codes, state_values = _codes(states)
+        state_keys = _keys(list(state_values) + [None])
+        table = np.array([self.states.get(key, self.default) for key in state_keys], dtype=object)
+        routed = table[state_codes]
+
+        if cities is not None and self.city_overrides:
+            city_codes, city_values = _codes(cities)
+            city_keys = _keys(list(city_values) + [None])
+            # Each distinct (city, state) pair is looked up once
+            width = len(state_keys)
+            pairs, inverse = np.unique(city_codes * width + state_codes, return_inverse=True)
+            overrides = np.array([
+                self.city_overrides.get((city_keys[pair // width], state_keys[pair % width]))
+                for pair in pairs
+            ], dtype=object)[inverse.reshape(-1)]
+            routed = np.where(pd.isna(overrides), routed, overrides)
+
+        return pd.Series(routed, index=states.index, dtype=object)
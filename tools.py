@@ -4,13 +4,46 @@ Functions that Claude can call to interact with the warehouse model
 """
 
 import os
+import re
 import sys
+import glob
+import threading
+import inspect
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+try:
+    from data_store import DATASETS, DataWatcher, ResultCache, compact_frame, compile_snapshot, is_snapshot_fresh, memory_bytes, read_snapshot, stale_sheets, StreamingExcelFile
+except ImportError:
+    from .data_store import DATASETS, DataWatcher, ResultCache, compact_frame, compile_snapshot, is_snapshot_fresh, memory_bytes, read_snapshot, stale_sheets, StreamingExcelFile
+
+try:
+    from indexes import DateIndex, DestinationIndex, PartitionIndex, SuggestionIndex, TrigramIndex
+except ImportError:
+    from .indexes import DateIndex, DestinationIndex, PartitionIndex, SuggestionIndex, TrigramIndex
+
+try:
+    from aggregates import WAREHOUSES, DistributionTable, SalesCube
+except ImportError:
+    from .aggregates import WAREHOUSES, DistributionTable, SalesCube
+
+try:
+    from routing import RoutingTable
+except ImportError:
+    from .routing import RoutingTable
+
+try:
+    from rates import CounterfactualEngine, LaneRates, RateMatrix, transport_type
+except ImportError:
+    from .rates import CounterfactualEngine, LaneRates, RateMatrix, transport_type
+
 # Import East Coast location analyzer (graceful fallback for deployment)
 try:
     from analysis.east_coast_location import analyze_east_coast_locations
@@ -31,38 +64,404 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 DATA_2023 = os.path.join(DATA_DIR, 'Sales 2023.xlsx')
 DATA_2024 = os.path.join(DATA_DIR, 'Sales 2024.xlsx')
 DATA_2025 = os.path.join(DATA_DIR, '2025 YTD SALES_10.30.25.xlsx')
+SALES_EXPORT_PATTERN = '2025 YTD SALES_*.xlsx'
 BACKLOG_FILE = os.path.join(DATA_DIR, 'Backlog excel report(2).xlsx')
 
 # Freight files
 FREIGHT_HOUSTON = os.path.join(DATA_DIR, 'Houston Freight 2025.xlsx')
 FREIGHT_WM = os.path.join(DATA_DIR, 'WM Freight 2025.xlsx')
 FREIGHT_STOCKTON = os.path.join(DATA_DIR, 'Stockton Freight 2025.xlsx')
+FREIGHT_FILES = {
+    'Houston': FREIGHT_HOUSTON,
+    'West Memphis': FREIGHT_WM,
+    'California': FREIGHT_STOCKTON
+}
+
+# Loading profile - the only raw columns the tools read
+SALES_COLUMNS = [
+    'Ship-to Country', 'Description.1', 'SO item short text', 'SO item Req.Qty',
+    'Sell-to Name', 'Ship-to Name', 'SO Document Date'
+]
+FREIGHT_COLUMNS = ['Date Shipped', 'Ship to on SO', 'Weight', 'Pallet Count', 'LTL/Closed/Flatbed']
+# Cost column names in order of preference; failing those, the first column
+# mentioning one of the hints that holds any cost
+FREIGHT_COST_COLUMNS = ['Cost', 'Total Cost', 'Freight Cost', 'Amount', 'Total', 'Charge', 'Freight']
+FREIGHT_COST_HINTS = ('cost', 'freight', 'amount')
+BACKLOG_COLUMNS = ['Ship-toTrasp.Zone', 'Inco 2', 'Order Qty']
+
+
+def _is_sales_column(col) -> bool:
+    name = str(col)
+    # Date-like columns feed the forecast's history length
+    return name in SALES_COLUMNS or 'date' in name.lower() or 'created' in name.lower()
+
+
+def _is_freight_column(col) -> bool:
+    name = str(col)
+    lower = name.lower()
+    # Any cost-like column may turn out to be the cost column
+    return (name in FREIGHT_COLUMNS or name in FREIGHT_COST_COLUMNS or
+            any(hint in lower for hint in FREIGHT_COST_HINTS))
+
+
+# Columnar snapshots of the workbooks above (see build_snapshots / ingest.py)
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', os.path.join(DATA_DIR, '.snapshots'))
+
+# Workbooks larger than this (MB on disk) are read in bounded batches, each
+# holding at most EXCEL_STREAM_MEMORY_MB of raw cells
+EXCEL_STREAM_THRESHOLD_MB = float(os.getenv('EXCEL_STREAM_THRESHOLD_MB', '25'))
+EXCEL_STREAM_MEMORY_MB = float(os.getenv('EXCEL_STREAM_MEMORY_MB', '64'))
+# Freight workbooks are parsed in worker processes only when together at least
+# this large (MB on disk) - below it, starting the workers costs more than it saves
+FREIGHT_PARALLEL_MIN_MB = float(os.getenv('FREIGHT_PARALLEL_MIN_MB', '8'))
+
+# Data version ids are derived from the files in DATA_DIR
+DATASETS.source_dir = DATA_DIR
+# Seconds between checks for changed data files in the API process (0 disables)
+DATA_WATCH_INTERVAL = float(os.getenv('DATA_WATCH_INTERVAL', '30'))
+# Tool result cache: entries kept per process, and default seconds an answer stays valid
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '512'))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '3600'))
+# Recompute hits served to differently spelled arguments and compare (debugging aid)
+RESULT_CACHE_VERIFY = os.getenv('RESULT_CACHE_VERIFY', '0') == '1'
 
 # State to warehouse mapping (v3.1 Smart Routing)
 CALIFORNIA_STATES = ['CALIFORNIA', 'OREGON', 'WASHINGTON', 'IDAHO', 'CA', 'OR', 'WA', 'ID']
 HOUSTON_STATES = ['TEXAS', 'TX']
 # Everything else goes to West Memphis
+# Cities served differently from the rest of their state: {('EL PASO', 'TX'): 'California'}
+ROUTING_CITY_OVERRIDES = {}
+
+ROUTING = RoutingTable(
+    {**{st: 'California' for st in CALIFORNIA_STATES}, **{st: 'Houston' for st in HOUSTON_STATES}},
+    default='West Memphis',
+    city_overrides=ROUTING_CITY_OVERRIDES
+)
 
 def get_warehouse_for_state(state: str) -> str:
     """Get the recommended warehouse for a state"""
-    state_upper = str(state).upper().strip()
+    return ROUTING.warehouse(state)
+
+def sales_files() -> List[str]:
+    """Sales workbooks - the YTD export is the newest one dropped into DATA_DIR"""
+    exports = glob.glob(os.path.join(DATA_DIR, SALES_EXPORT_PATTERN))
+    latest = max(exports, key=lambda path: (os.path.getmtime(path), path)) if exports else DATA_2025
+    return [DATA_2023, DATA_2024, latest]
+
+
+def _open_excel(filepath: str):
+    """pd.ExcelFile, or a streaming reader for workbooks above the size threshold"""
+    if os.path.getsize(filepath) > EXCEL_STREAM_THRESHOLD_MB * 1e6:
+        return StreamingExcelFile(filepath, memory_limit=int(EXCEL_STREAM_MEMORY_MB * 2**20))
+    return pd.ExcelFile(filepath)
+
+
+def _parse_sales_workbook(filepath: str, profiled: bool = True) -> pd.DataFrame:
+    with _open_excel(filepath) as xl:
+        if not profiled:
+            return xl.parse(0)
+        return compact_frame(xl.parse(0, usecols=_is_sales_column))
+
+
+def _parse_backlog_workbook(filepath: str, profiled: bool = True) -> pd.DataFrame:
+    return pd.read_excel(filepath, sheet_name='Sheet1',
+                         usecols=(lambda col: col in BACKLOG_COLUMNS) if profiled else None)
+
+
+def _parse_freight_sheets(filepath: str, wh_name: str, profiled: bool = True,
+                          sheets=None) -> Dict[str, pd.DataFrame]:
+    """Month sheets of a freight workbook (all, or only `sheets`), tagged with warehouse and sheet"""
+    frames = {}
+
+    # One open/unzip of the workbook serves every sheet
+    with _open_excel(filepath) as xl:
+        for sheet in xl.sheet_names:
+            # Skip non-month sheets
+            if sheet.lower() in ['sheet1', 'sheet2', 'full year']:
+                continue
+            if sheets is not None and sheet not in sheets:
+                continue
+            try:
+                df = xl.parse(sheet, usecols=_is_freight_column if profiled else None)
+                if not df.empty:
+                    df['_warehouse'] = wh_name
+                    df['_sheet'] = sheet
+                    frames[sheet] = df
+            except:
+                pass
+
+    return frames
+
 
-    if state_upper in CALIFORNIA_STATES:
-        return 'California'
-    elif state_upper in HOUSTON_STATES:
-        return 'Houston'
+def _parse_freight_workbook(filepath: str, wh_name: str, profiled: bool = True) -> pd.DataFrame:
+    """All month sheets of a freight workbook, tagged with warehouse and sheet"""
+    frames = _parse_freight_sheets(filepath, wh_name, profiled)
+    if frames:
+        df = pd.concat(list(frames.values()), ignore_index=True)
+        return compact_frame(df, categories=['_warehouse', '_sheet']) if profiled else df
+    return pd.DataFrame()
+
+
+def _ingest_freight_workbook(filepath: str, wh_name: str, profiled: bool = True,
+                             incremental: bool = True) -> pd.DataFrame:
+    """
+    Freight workbook parsed incrementally: month sheets unchanged since the
+    last snapshot (even a stale one) are reused from it and only new or
+    changed sheets are parsed. Same rows, columns and sheet order as a full
+    parse; the sheet fingerprints travel with the rows in the snapshot.
+    """
+    if not profiled:
+        return _parse_freight_workbook(filepath, wh_name, profiled=False)
+
+    previous = read_snapshot(SNAPSHOT_DIR, filepath, allow_stale=True) if incremental else None
+    if previous is not None and previous.attrs.get('warehouse') != wh_name:
+        previous = None
+    try:
+        stale, manifest = stale_sheets(filepath, previous.attrs.get('sheet_manifest') if previous is not None else None)
+    except Exception:
+        stale, manifest = None, None  # Not a readable .xlsx package - plain parse
+
+    if stale is None:
+        frames = _parse_freight_sheets(filepath, wh_name)
     else:
-        return 'West Memphis'
+        parsed = _parse_freight_sheets(filepath, wh_name, sheets=set(stale)) if stale else {}
+        columns = previous.attrs.get('sheet_columns', {})
+        frames = {}
+        for sheet in manifest['sheets']:
+            if sheet in parsed:
+                frames[sheet] = parsed[sheet]
+            elif sheet not in stale and sheet in columns:
+                frames[sheet] = previous.loc[previous['_sheet'] == sheet, columns[sheet]]
+
+    if frames:
+        df = compact_frame(pd.concat(list(frames.values()), ignore_index=True),
+                           categories=['_warehouse', '_sheet'])
+    else:
+        df = pd.DataFrame()
 
-def load_sales_data() -> pd.DataFrame:
-    """Load and combine all sales data"""
+    if manifest is not None:
+        df.attrs['warehouse'] = wh_name
+        df.attrs['sheet_manifest'] = manifest
+        df.attrs['sheet_columns'] = {sheet: list(frame.columns) for sheet, frame in frames.items()}
+    return df
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _parallel_parse(paths: List[str]) -> bool:
+    """Worth parsing these workbooks in worker processes: more than one, more than
+    one CPU, and enough data to outweigh handing the frames back"""
+    paths = [path for path in paths if os.path.exists(path)]
+    if len(paths) < 2 or (os.cpu_count() or 1) < 2:
+        return False
+    return sum(os.path.getsize(path) for path in paths) >= FREIGHT_PARALLEL_MIN_MB * 1e6
+
+
+def _process_pool():
+    """
+    Worker processes for parsing workbooks, started on first use and kept
+    for the life of the process. Spawned, not forked: the API process has a
+    watcher thread and the event loop's thread pool running.
+    """
+    global _pool
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _pool_lock:
+        if _pool is None:
+            workers = min(os.cpu_count() or 1, max(len(FREIGHT_FILES), 2))
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _discard_process_pool():
+    """Drop a pool that failed so the next parallel parse starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_freight_parallel(files: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """Ingest several freight workbooks side by side in the worker processes"""
+    parsed = {}
+    if not _parallel_parse(list(files.values())):
+        return parsed  # Caller parses serially
+    try:
+        pool = _process_pool()
+        futures = {
+            wh_name: pool.submit(_ingest_freight_workbook, filepath, wh_name)
+            for wh_name, filepath in files.items()
+        }
+        for wh_name, future in futures.items():
+            try:
+                parsed[wh_name] = future.result()
+            except BrokenProcessPool:
+                _discard_process_pool()  # A worker died - re-parsed serially by the caller
+            except:
+                pass  # Re-parsed (and reported) serially by the caller
+    except:
+        _discard_process_pool()  # Caller parses serially
+    return parsed
+
+
+def _snapshot_sources(incremental: bool = True) -> List[tuple]:
+    """(workbook path, parser) for every Excel source the tools read"""
+    sources = [(filepath, _parse_sales_workbook) for filepath in sales_files()]
+    sources.append((BACKLOG_FILE, _parse_backlog_workbook))
+    for wh_name, filepath in FREIGHT_FILES.items():
+        sources.append((filepath, lambda path, profiled=True, wh_name=wh_name:
+                        _ingest_freight_workbook(path, wh_name, profiled, incremental)))
+    return sources
+
+
+def _load_workbook(filepath: str, parse) -> pd.DataFrame:
+    """Read a workbook from its columnar snapshot when up to date, else parse the Excel"""
+    df = read_snapshot(SNAPSHOT_DIR, filepath)
+    if df is None:
+        df = parse(filepath)
+    return df
+
+
+def _compile_source(filepath: str, parse) -> Dict[str, Any]:
+    """Compile one workbook's snapshot - build_snapshots report entry"""
+    import time
+
+    start = time.time()
+    try:
+        df, path = compile_snapshot(SNAPSHOT_DIR, filepath, parse)
+        return {
+            "status": "written",
+            "rows": len(df),
+            "snapshot": os.path.basename(path),
+            "seconds": round(time.time() - start, 2)
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def _compile_freight_source(filepath: str, wh_name: str, incremental: bool = True) -> Dict[str, Any]:
+    """_compile_source for a freight workbook, runnable in a worker process"""
+    return _compile_source(filepath, lambda path: _ingest_freight_workbook(path, wh_name, incremental=incremental))
+
+
+def build_snapshots(force: bool = False) -> Dict[str, Any]:
+    """
+    Compile every Excel source into a columnar snapshot (stale ones only unless
+    forced). Stale freight workbooks large enough to gain from it are parsed
+    in the worker processes while the other sources compile here.
+    """
+    report = {}
+    stale = []
+    # Forced rebuilds re-parse every freight sheet instead of reusing unchanged ones
+    for filepath, parse in _snapshot_sources(incremental=not force):
+        name = os.path.basename(filepath)
+        if not os.path.exists(filepath):
+            report[name] = {"status": "missing"}
+        elif not force and is_snapshot_fresh(SNAPSHOT_DIR, filepath):
+            report[name] = {"status": "fresh"}
+        else:
+            report[name] = None  # Keeps the report in source order
+            stale.append((filepath, parse))
+
+    warehouses = {filepath: wh_name for wh_name, filepath in FREIGHT_FILES.items()}
+    freight = [filepath for filepath, _ in stale if filepath in warehouses]
+
+    futures = {}
+    if _parallel_parse(freight):
+        try:
+            pool = _process_pool()
+            futures = {
+                filepath: pool.submit(_compile_freight_source, filepath, warehouses[filepath], not force)
+                for filepath in freight
+            }
+        except:
+            _discard_process_pool()  # Compiled serially below
+
+    compiled = {}
+    for filepath, parse in stale:
+        if filepath not in futures:
+            compiled[filepath] = _compile_source(filepath, parse)
+    for filepath, future in futures.items():
+        try:
+            compiled[filepath] = future.result()
+        except BrokenProcessPool:
+            _discard_process_pool()  # A worker died - compiled serially below
+        except:
+            pass  # Compiled serially below
+
+    for filepath, parse in stale:
+        if filepath not in compiled:
+            compiled[filepath] = _compile_source(filepath, parse)
+        report[os.path.basename(filepath)] = compiled[filepath]
+
+    return report
+
+
+def profile_memory() -> Dict[str, Any]:
+    """
+    In-memory size of each source with and without the loading profile
+    (column pruning, categoricals, downcasting). Parses every workbook twice,
+    so it is meant for the ingest CLI rather than the request path.
+    """
+    report = {}
+    total_full = total_profiled = 0
+
+    for filepath, parse in _snapshot_sources():
+        if not os.path.exists(filepath):
+            continue
+        try:
+            full = memory_bytes(parse(filepath, profiled=False))
+            profiled = memory_bytes(parse(filepath))
+        except Exception as e:
+            report[os.path.basename(filepath)] = {"error": str(e)}
+            continue
+        total_full += full
+        total_profiled += profiled
+        report[os.path.basename(filepath)] = {
+            "full_mb": round(full / 1e6, 2),
+            "profiled_mb": round(profiled / 1e6, 2),
+            "saved_pct": round((1 - profiled / full) * 100, 1) if full else 0
+        }
+
+    report["total"] = {
+        "full_mb": round(total_full / 1e6, 2),
+        "profiled_mb": round(total_profiled / 1e6, 2),
+        "saved_mb": round((total_full - total_profiled) / 1e6, 2),
+        "saved_pct": round((1 - total_profiled / total_full) * 100, 1) if total_full else 0
+    }
+    return report
+
+
+def data_version() -> str:
+    """Id of the data the current request reads (for cache keys and responses)"""
+    return DATASETS.version
+
+
+# Hot reload for the API process: stale snapshots are recompiled, then changed
+# datasets are rebuilt off the request path and swapped in as a whole
+DATA_WATCHER = DataWatcher(DATASETS, DATA_DIR, DATA_WATCH_INTERVAL, before_refresh=build_snapshots)
+
+
+def _read_sales_workbook(filepath: str) -> pd.DataFrame:
+    """Parse one sales workbook (cached per file)"""
+    return DATASETS.get(
+        f"sales:{os.path.basename(filepath)}",
+        [filepath],
+        lambda: _load_workbook(filepath, _parse_sales_workbook)
+    )
+
+
+def _build_sales_data() -> pd.DataFrame:
     all_data = []
 
-    for filepath in [DATA_2023, DATA_2024, DATA_2025]:
+    for filepath in sales_files():
         if os.path.exists(filepath):
             try:
-                df = pd.read_excel(filepath, sheet_name=0)
-                all_data.append(df)
+                all_data.append(_read_sales_workbook(filepath))
             except:
                 pass
 
@@ -70,6 +469,219 @@ def load_sales_data() -> pd.DataFrame:
         return pd.concat(all_data, ignore_index=True)
     return pd.DataFrame()
 
+
+def load_sales_data() -> pd.DataFrame:
+    """Load and combine all sales data (parsed once, re-read only when a file changes)"""
+    return DATASETS.get("sales", sales_files, _build_sales_data)
+
+
+# Raw export column behind each sales fact column. Tools report an export missing
+# one they need; only 'SO Document Date' (Order Date) is optional.
+SALES_FACT_SOURCES = {
+    'State': 'Description.1',
+    'Product': 'SO item short text',
+    'Customer': 'Sell-to Name',
+    'Ship To': 'Ship-to Name',
+    'Quantity': 'SO item Req.Qty',
+    'Order Date': 'SO Document Date',
+    'Is USA': 'Ship-to Country',
+}
+
+
+def _raw_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """Column from a raw export, or an all-missing column if this export lacks it
+    (tools needing it check _missing_sales_columns first)"""
+    if col in df.columns:
+        return df[col]
+    return pd.Series(pd.NA, index=df.index, dtype=object)
+
+
+def _missing_sales_columns(*fact_columns: str) -> Optional[Dict[str, Any]]:
+    """Error naming the raw columns the given fact columns need but the sales export lacks, or None"""
+    available = DATASETS.get("sales_columns", sales_files, lambda: set(load_sales_data().columns))
+    missing = [SALES_FACT_SOURCES[col] for col in fact_columns if SALES_FACT_SOURCES[col] not in available]
+    if missing:
+        return {"error": f"Sales data is missing required column(s): {', '.join(repr(col) for col in missing)}"}
+    return None
+
+
+def _build_sales_facts() -> pd.DataFrame:
+    """Normalize the raw sales rows into the typed columns every sales tool uses"""
+    df = load_sales_data()
+
+    if df.empty:
+        return pd.DataFrame()
+
+    facts = pd.DataFrame({
+        # Missing values stay '' here, as search_orders reports them; the USA
+        # table the analytics tools read labels them 'UNKNOWN'
+        'State': _raw_column(df, 'Description.1').fillna('').astype(str),
+        'Product': _raw_column(df, 'SO item short text').fillna('').astype(str),
+        'Customer': _raw_column(df, 'Sell-to Name').fillna('').astype(str),
+        'Ship To': _raw_column(df, 'Ship-to Name').fillna('').astype(str),
+        'Quantity': pd.to_numeric(_raw_column(df, 'SO item Req.Qty'), errors='coerce').fillna(0),
+        'Order Date': pd.to_datetime(_raw_column(df, 'SO Document Date'), errors='coerce'),
+        'Is USA': (_raw_column(df, 'Ship-to Country') == 'USA').fillna(False).astype(bool),
+    })
+
+    facts['Warehouse'] = ROUTING.route(facts['State'])
+
+    return compact_frame(facts, categories=['State', 'Product', 'Customer', 'Ship To', 'Warehouse'])
+
+
+def _build_sales_data_months() -> int:
+    """Months of history covered by the USA orders (first date-like column)"""
+    df = load_sales_data()
+    data_months = 34  # Default: Jan 2023 - Oct 2025
+
+    if df.empty or 'Ship-to Country' not in df.columns:
+        return data_months
+
+    df_usa = df[df['Ship-to Country'] == 'USA']
+    date_col = None
+    for col in df_usa.columns:
+        if 'date' in str(col).lower() or 'created' in str(col).lower():
+            date_col = col
+            break
+
+    if date_col:
+        try:
+            valid_dates = pd.to_datetime(df_usa[date_col], errors='coerce').dropna()
+            if len(valid_dates) > 0:
+                min_date = valid_dates.min()
+                max_date = valid_dates.max()
+                data_months = max(1, (max_date.year - min_date.year) * 12 + (max_date.month - min_date.month) + 1)
+        except:
+            pass
+
+    return data_months
+
+
+def _label_missing(column: pd.Series, label: str = 'UNKNOWN') -> pd.Series:
+    """Categorical text column with '' (missing) values relabeled"""
+    if '' not in column.cat.categories:
+        return column
+    return column.astype(str).replace('', label).astype('category')
+
+
+def load_sales_facts(usa_only: bool = False) -> pd.DataFrame:
+    """
+    Canonical sales fact table: one row per order line with State, Product,
+    Customer, Ship To, Quantity, Order Date, Is USA and Warehouse already derived.
+    Built once per version of the sales files. The USA-only table, read by the
+    distribution, state, warehouse and forecast tools, labels a missing State
+    or Product 'UNKNOWN'; the full table leaves it ''.
+    """
+    if usa_only:
+        def build():
+            facts = load_sales_facts()
+            if facts.empty:
+                return facts
+            usa = facts[facts['Is USA']].reset_index(drop=True)
+            for col in ('State', 'Product'):
+                usa[col] = _label_missing(usa[col])
+            return usa
+        return DATASETS.get("sales_facts_usa", sales_files, build)
+
+    return DATASETS.get("sales_facts", sales_files, _build_sales_facts)
+
+
+def sales_text_index(column: str, usa_only: bool = False) -> TrigramIndex:
+    """Trigram index over the distinct values of a sales fact text column (Product, Customer, Ship To)"""
+    return DATASETS.get(
+        f"sales_index:{column}" + (":usa" if usa_only else ""),
+        sales_files,
+        lambda: TrigramIndex(load_sales_facts(usa_only)[column].cat.categories)
+    )
+
+
+def sales_date_index() -> DateIndex:
+    """Sales fact rows sorted by Order Date, for date range filters"""
+    return DATASETS.get(
+        "sales_date_index",
+        sales_files,
+        lambda: DateIndex(load_sales_facts()['Order Date'])
+    )
+
+
+def sales_suggestion_index(field: str) -> SuggestionIndex:
+    """Distinct customer (Customer and Ship To) or product names for "did you mean" suggestions"""
+    columns = {'customer': ('Customer', 'Ship To'), 'product': ('Product',)}[field]
+
+    def build():
+        facts = load_sales_facts()
+        return SuggestionIndex(name for col in columns for name in facts[col].cat.categories)
+
+    return DATASETS.get(f"sales_suggestions:{field}", sales_files, build)
+
+
+def _suggestions(index: SuggestionIndex, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    return [{"name": name, "score": score} for name, score in index.suggest(query, limit)]
+
+
+def _contains(df: pd.DataFrame, column: str, query: str, ignore_case: bool = False,
+              usa_only: bool = False) -> np.ndarray:
+    """Row mask equal to df[column].str.upper().str.contains(query.upper()) - or
+    str.contains(query, case=False) with ignore_case - resolved through the index
+    of the full (or USA-only) fact table df was taken from"""
+    return sales_text_index(column, usa_only).mask(df[column], query, ignore_case)
+
+
+def sales_cube() -> SalesCube:
+    """USA sales rolled up by state, product, warehouse and month"""
+    return DATASETS.get("sales_cube", sales_files, lambda: SalesCube(load_sales_facts(usa_only=True)))
+
+
+def distribution_table() -> DistributionTable:
+    """USA order lines and quantity per product and model warehouse"""
+    return DATASETS.get(
+        "distribution_table",
+        sales_files,
+        lambda: DistributionTable(load_sales_facts(usa_only=True), sales_text_index('Product', usa_only=True))
+    )
+
+
+def get_sales_data_months() -> int:
+    return DATASETS.get("sales_data_months", sales_files, _build_sales_data_months)
+
+
+def _build_backlog_model() -> pd.DataFrame:
+    """Backlog lines with State, Quantity and actual/model warehouse, derived column-wise"""
+    df = _load_workbook(BACKLOG_FILE, _parse_backlog_workbook)
+
+    # State = first two characters of the transport zone ("TX1" -> "TX")
+    zone = df['Ship-toTrasp.Zone']
+    state = zone.astype(str).str[:2].str.upper().where(zone.notna())
+
+    # Actual shipping warehouse from the Incoterms location
+    inco2 = df['Inco 2']
+    inco2_upper = inco2.astype(str).str.upper()
+    actual = pd.Series(
+        np.select(
+            [inco2_upper.str.contains('MEMPHIS', regex=False),
+             inco2_upper.str.contains('HOUSTON', regex=False),
+             inco2_upper.str.contains('STOCKTON', regex=False)],
+            ['West Memphis', 'Houston', 'California'],
+            default=None
+        ),
+        index=df.index, dtype=object
+    ).where(inco2.notna())
+
+    model = pd.DataFrame({
+        'State': state,
+        'Quantity': pd.to_numeric(df['Order Qty'], errors='coerce').fillna(0),
+        'Actual_WH': actual,
+        'Model_WH': ROUTING.route(state),
+    })
+    model['Warehouse'] = model['Actual_WH'].fillna('Unknown')
+
+    return compact_frame(model, categories=['State', 'Warehouse', 'Model_WH'])
+
+
+def load_backlog_model() -> pd.DataFrame:
+    """Open backlog lines, loaded once per version of the backlog file"""
+    return DATASETS.get("backlog", [BACKLOG_FILE], _build_backlog_model)
+
 # ============================================================================
 # TOOL DEFINITIONS (for Claude API)
 # ============================================================================
@@ -97,6 +709,38 @@ TOOLS = [
             "required": ["product_name", "quantity"]
         }
     },
+    {
+        "name": "get_distribution_batch",
+        "description": "Calculate warehouse distribution for several products in one call (e.g. a purchasing plan). Returns each product's split plus the combined totals per warehouse.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "description": "Products to distribute",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "product_name": {
+                                "type": "string",
+                                "description": "Product name (e.g., 'N 14/146 DC')"
+                            },
+                            "quantity": {
+                                "type": "integer",
+                                "description": "Total quantity to distribute"
+                            },
+                            "customer_state": {
+                                "type": "string",
+                                "description": "Optional: Customer's state for specific routing"
+                            }
+                        },
+                        "required": ["product_name", "quantity"]
+                    }
+                }
+            },
+            "required": ["items"]
+        }
+    },
     {
         "name": "analyze_state",
         "description": "Analyze shipping patterns for a specific state. Returns volume, top products, and recommended warehouse.",
@@ -326,77 +970,46 @@ TOOLS = [
 # TOOL IMPLEMENTATIONS
 # ============================================================================
 
-def get_distribution(product_name: str, quantity: int, customer_state: str = None) -> Dict[str, Any]:
-    """Calculate optimal warehouse distribution"""
-
-    # If customer state is provided, route to that warehouse
-    if customer_state:
-        warehouse = get_warehouse_for_state(customer_state)
-        return {
-            "product": product_name,
-            "total_quantity": quantity,
-            "distribution": {
-                "California": quantity if warehouse == "California" else 0,
-                "Houston": quantity if warehouse == "Houston" else 0,
-                "West Memphis": quantity if warehouse == "West Memphis" else 0
-            },
-            "method": f"State-based routing ({customer_state} → {warehouse})",
-            "confidence": "HIGH"
-        }
-
-    # Load historical data to find product patterns
-    df = load_sales_data()
+def _state_distribution(product_name: str, quantity: int, customer_state: str) -> Dict[str, Any]:
+    """Whole quantity to the warehouse serving the customer's state"""
+    warehouse = get_warehouse_for_state(customer_state)
+    return {
+        "product": product_name,
+        "total_quantity": quantity,
+        "distribution": {
+            "California": quantity if warehouse == "California" else 0,
+            "Houston": quantity if warehouse == "Houston" else 0,
+            "West Memphis": quantity if warehouse == "West Memphis" else 0
+        },
+        "method": f"State-based routing ({customer_state} → {warehouse})",
+        "confidence": "HIGH"
+    }
 
-    if df.empty:
-        # Default distribution if no data
-        return {
-            "product": product_name,
-            "total_quantity": quantity,
-            "distribution": {
-                "California": int(quantity * 0.10),
-                "Houston": int(quantity * 0.25),
-                "West Memphis": int(quantity * 0.65)
-            },
-            "method": "Default distribution (no historical data)",
-            "confidence": "LOW"
-        }
 
-    # Filter USA and get product data
-    df_usa = df[df['Ship-to Country'] == 'USA'].copy()
-    df_usa['State'] = df_usa['Description.1'].fillna('UNKNOWN')
-    df_usa['Product'] = df_usa['SO item short text'].fillna('UNKNOWN')
-    df_usa['Quantity'] = df_usa['SO item Req.Qty'].fillna(0)
+def _default_distribution(product_name: str, quantity: int, method: str, confidence: str) -> Dict[str, Any]:
+    return {
+        "product": product_name,
+        "total_quantity": quantity,
+        "distribution": {
+            "California": int(quantity * 0.10),
+            "Houston": int(quantity * 0.25),
+            "West Memphis": int(quantity * 0.65)
+        },
+        "method": method,
+        "confidence": confidence
+    }
 
-    # Find matching products
-    product_df = df_usa[df_usa['Product'].str.contains(product_name, case=False, na=False)]
 
-    if len(product_df) < 5:
+def _historical_distribution(product_name: str, quantity: int, orders: int,
+                             shares: Dict[str, float]) -> Dict[str, Any]:
+    """Split by the matching products' historical warehouse shares"""
+    if orders < 5:
         # Not enough data, use default
-        return {
-            "product": product_name,
-            "total_quantity": quantity,
-            "distribution": {
-                "California": int(quantity * 0.10),
-                "Houston": int(quantity * 0.25),
-                "West Memphis": int(quantity * 0.65)
-            },
-            "method": f"Default distribution (only {len(product_df)} historical orders)",
-            "confidence": "MEDIUM"
-        }
+        return _default_distribution(product_name, quantity,
+                                     f"Default distribution (only {orders} historical orders)", "MEDIUM")
 
     # Calculate distribution based on historical state patterns
-    product_df = product_df.copy()
-    product_df['Warehouse'] = product_df['State'].apply(get_warehouse_for_state)
-    warehouse_dist = product_df.groupby('Warehouse')['Quantity'].sum()
-    total_qty = warehouse_dist.sum()
-
-    if total_qty == 0:
-        total_qty = 1
-
-    distribution = {}
-    for wh in ['California', 'Houston', 'West Memphis']:
-        pct = warehouse_dist.get(wh, 0) / total_qty
-        distribution[wh] = int(quantity * pct)
+    distribution = {wh: int(quantity * shares[wh]) for wh in WAREHOUSES}
 
     # Adjust for rounding
     diff = quantity - sum(distribution.values())
@@ -406,45 +1019,131 @@ def get_distribution(product_name: str, quantity: int, customer_state: str = Non
         "product": product_name,
         "total_quantity": quantity,
         "distribution": distribution,
-        "historical_orders": len(product_df),
+        "historical_orders": orders,
         "method": "Historical pattern analysis",
-        "confidence": "HIGH" if len(product_df) > 20 else "MEDIUM"
+        "confidence": "HIGH" if orders > 20 else "MEDIUM"
+    }
+
+
+def get_distribution(product_name: str, quantity: int, customer_state: str = None) -> Dict[str, Any]:
+    """Calculate optimal warehouse distribution"""
+
+    # If customer state is provided, route to that warehouse
+    if customer_state:
+        return _state_distribution(product_name, quantity, customer_state)
+
+    # Load historical data to find product patterns
+    if load_sales_facts().empty:
+        # Default distribution if no data
+        return _default_distribution(product_name, quantity, "Default distribution (no historical data)", "LOW")
+
+    missing = _missing_sales_columns('State', 'Product', 'Quantity', 'Is USA')
+    if missing:
+        return {"product": product_name, **missing}
+
+    # Historical USA order lines and warehouse shares for the matching products
+    orders, shares = distribution_table().profile(product_name)
+    return _historical_distribution(product_name, quantity, orders, shares)
+
+
+def _whole_quantity(value) -> Optional[int]:
+    """A quantity as an int, or None unless it is a whole number (10, 10.0, "10")"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def get_distribution_batch(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Warehouse split for many products at once: every product's historical
+    profile is resolved in one grouped lookup against the distribution table
+    """
+    results = [None] * len(items)
+    historical = {}
+
+    for i, item in enumerate(items):
+        # A bad item gets its own error; the rest of the batch still computes
+        if not isinstance(item, dict):
+            results[i] = {"product": None, "error": "Each item needs product_name and quantity"}
+            continue
+        product_name = item.get("product_name")
+        quantity = item.get("quantity")
+        if not product_name or quantity is None:
+            results[i] = {"product": product_name, "error": "Each item needs product_name and quantity"}
+            continue
+        whole = _whole_quantity(quantity)
+        if whole is None:
+            results[i] = {"product": product_name, "error": f"Invalid quantity: {quantity!r} (must be a whole number)"}
+            continue
+
+        if item.get("customer_state"):
+            results[i] = _state_distribution(product_name, whole, item["customer_state"])
+        else:
+            historical[i] = (product_name, whole)
+
+    if historical:
+        if load_sales_facts().empty:
+            for i, (product_name, quantity) in historical.items():
+                results[i] = _default_distribution(product_name, quantity,
+                                                   "Default distribution (no historical data)", "LOW")
+        else:
+            missing = _missing_sales_columns('State', 'Product', 'Quantity', 'Is USA')
+            profiles = {} if missing else distribution_table().profile_many(
+                product_name for product_name, _ in historical.values())
+            for i, (product_name, quantity) in historical.items():
+                if missing:
+                    results[i] = {"product": product_name, **missing}
+                elif product_name not in profiles:
+                    results[i] = {"product": product_name, "error": f"Invalid product name pattern: {product_name!r}"}
+                else:
+                    results[i] = _historical_distribution(product_name, quantity, *profiles[product_name])
+
+    totals = {wh: 0 for wh in WAREHOUSES}
+    for result in results:
+        if "distribution" not in result:
+            continue
+        for wh in WAREHOUSES:
+            totals[wh] += result["distribution"][wh]
+
+    return {
+        "products": len(results),
+        "total_quantity": sum(totals.values()),
+        "distribution": totals,
+        "items": results
     }
 
 
 def analyze_state(state: str) -> Dict[str, Any]:
     """Analyze shipping patterns for a state"""
 
-    df = load_sales_data()
-
-    if df.empty:
+    if load_sales_facts().empty:
         return {"error": "Could not load sales data"}
 
-    # Filter USA
-    df_usa = df[df['Ship-to Country'] == 'USA'].copy()
-    df_usa['State'] = df_usa['Description.1'].fillna('UNKNOWN')
-    df_usa['Product'] = df_usa['SO item short text'].fillna('UNKNOWN')
-    df_usa['Quantity'] = df_usa['SO item Req.Qty'].fillna(0)
+    missing = _missing_sales_columns('State', 'Product', 'Quantity', 'Is USA')
+    if missing:
+        return {"state": state, **missing}
 
     # Normalize state name
     state_upper = state.upper().strip()
 
-    # Filter by state
-    state_df = df_usa[df_usa['State'].str.upper() == state_upper]
+    rollup = sales_cube().state(state_upper)
 
-    if len(state_df) == 0:
+    if rollup is None:
         return {
             "state": state,
             "error": f"No data found for state: {state}",
             "recommended_warehouse": get_warehouse_for_state(state)
         }
 
-    # Calculate stats
-    total_orders = len(state_df)
-    total_quantity = state_df['Quantity'].sum()
-
-    # Top products
-    top_products = state_df.groupby('Product')['Quantity'].sum().sort_values(ascending=False).head(5)
+    total_orders = rollup['orders']
+    total_quantity = rollup['quantity']
+    top_products = rollup['top']['Product']
 
     return {
         "state": state,
@@ -468,41 +1167,35 @@ def get_warehouse_info(warehouse: str) -> Dict[str, Any]:
         "West Memphis": ["All other states (Main Hub)"]
     }
 
-    df = load_sales_data()
-
-    if df.empty:
+    if load_sales_facts().empty:
         return {
             "warehouse": warehouse,
             "states_served": warehouse_states.get(warehouse, []),
             "error": "Could not load sales data for volume calculation"
         }
 
-    # Filter USA
-    df_usa = df[df['Ship-to Country'] == 'USA'].copy()
-    df_usa['State'] = df_usa['Description.1'].fillna('UNKNOWN')
-    df_usa['Product'] = df_usa['SO item short text'].fillna('UNKNOWN')
-    df_usa['Quantity'] = df_usa['SO item Req.Qty'].fillna(0)
-    df_usa['Warehouse'] = df_usa['State'].apply(get_warehouse_for_state)
-
-    # Filter by warehouse
-    wh_df = df_usa[df_usa['Warehouse'] == warehouse]
+    missing = _missing_sales_columns('State', 'Product', 'Quantity', 'Is USA')
+    if missing:
+        return {"warehouse": warehouse, "states_served": warehouse_states.get(warehouse, []), **missing}
 
-    # Calculate stats
-    total_orders = len(wh_df)
-    total_quantity = wh_df['Quantity'].sum()
+    cube = sales_cube()
+    rollup = cube.warehouse(warehouse)
 
-    # Top products
-    top_products = wh_df.groupby('Product')['Quantity'].sum().sort_values(ascending=False).head(5)
-
-    # Top states
-    top_states = wh_df.groupby('State')['Quantity'].sum().sort_values(ascending=False).head(5)
+    if rollup is None:
+        total_orders, total_quantity = 0, 0
+        top_products, top_states = {}, {}
+    else:
+        total_orders = rollup['orders']
+        total_quantity = rollup['quantity']
+        top_products = rollup['top']['Product']
+        top_states = rollup['top']['State']
 
     return {
         "warehouse": warehouse,
         "states_served": warehouse_states.get(warehouse, []),
         "total_orders": int(total_orders),
         "total_quantity": int(total_quantity),
-        "pct_of_total": round(total_orders / len(df_usa) * 100, 1) if len(df_usa) > 0 else 0,
+        "pct_of_total": round(total_orders / cube.rows * 100, 1) if cube.rows > 0 else 0,
         "top_products": [
             {"product": prod, "quantity": int(qty)}
             for prod, qty in top_products.items()
@@ -517,38 +1210,20 @@ def get_warehouse_info(warehouse: str) -> Dict[str, Any]:
 def forecast_demand(product_name: str, months: int = 3) -> Dict[str, Any]:
     """Forecast demand for a product"""
 
-    df = load_sales_data()
-
-    if df.empty:
+    if load_sales_facts().empty:
         return {"error": "Could not load sales data"}
 
-    # Filter USA
-    df_usa = df[df['Ship-to Country'] == 'USA'].copy()
-    df_usa['Product'] = df_usa['SO item short text'].fillna('UNKNOWN')
-    df_usa['Quantity'] = pd.to_numeric(df_usa['SO item Req.Qty'], errors='coerce').fillna(0)
+    missing = _missing_sales_columns('Product', 'Quantity', 'Is USA')
+    if missing:
+        return {"product": product_name, **missing}
 
-    # Try to get actual date range
-    date_col = None
-    for col in df_usa.columns:
-        if 'date' in col.lower() or 'created' in col.lower():
-            date_col = col
-            break
+    df_usa = load_sales_facts(usa_only=True)
 
-    # Calculate actual months of data
-    data_months = 34  # Default: Jan 2023 - Oct 2025
-    if date_col:
-        try:
-            df_usa['_date'] = pd.to_datetime(df_usa[date_col], errors='coerce')
-            valid_dates = df_usa['_date'].dropna()
-            if len(valid_dates) > 0:
-                min_date = valid_dates.min()
-                max_date = valid_dates.max()
-                data_months = max(1, (max_date.year - min_date.year) * 12 + (max_date.month - min_date.month) + 1)
-        except:
-            pass
+    # Actual months of data
+    data_months = get_sales_data_months()
 
     # Find matching products
-    product_df = df_usa[df_usa['Product'].str.contains(product_name, case=False, na=False)]
+    product_df = df_usa[_contains(df_usa, 'Product', product_name, ignore_case=True, usa_only=True)]
 
     if len(product_df) < 5:
         return {
@@ -589,36 +1264,12 @@ def get_backlog_summary(group_by: str = "warehouse") -> Dict[str, Any]:
         return {"error": "Backlog file not found"}
 
     try:
-        df = pd.read_excel(BACKLOG_FILE, sheet_name='Sheet1')
+        df = load_backlog_model()
     except:
         return {"error": "Could not read backlog file"}
 
-    # Extract state from zone
-    def extract_state(zone):
-        if pd.isna(zone):
-            return None
-        return str(zone)[:2].upper()
-
-    df['State'] = df['Ship-toTrasp.Zone'].apply(extract_state)
-    df['Quantity'] = pd.to_numeric(df['Order Qty'], errors='coerce').fillna(0)
-
-    # Extract warehouse
-    def extract_warehouse(inco2):
-        if pd.isna(inco2):
-            return 'Unknown'
-        inco2_upper = str(inco2).upper()
-        if 'MEMPHIS' in inco2_upper:
-            return 'West Memphis'
-        elif 'HOUSTON' in inco2_upper:
-            return 'Houston'
-        elif 'STOCKTON' in inco2_upper:
-            return 'California'
-        return 'Unknown'
-
-    df['Warehouse'] = df['Inco 2'].apply(extract_warehouse)
-
     if group_by == "warehouse":
-        summary = df.groupby('Warehouse').agg({
+        summary = df.groupby('Warehouse', observed=True).agg({
             'Quantity': ['sum', 'count']
         })
         summary.columns = ['total_quantity', 'order_count']
@@ -638,7 +1289,7 @@ def get_backlog_summary(group_by: str = "warehouse") -> Dict[str, Any]:
         }
 
     elif group_by == "state":
-        summary = df.groupby('State').agg({
+        summary = df.groupby('State', observed=True).agg({
             'Quantity': ['sum', 'count']
         }).sort_values(('Quantity', 'sum'), ascending=False).head(10)
         summary.columns = ['total_quantity', 'order_count']
@@ -665,35 +1316,12 @@ def compare_routing() -> Dict[str, Any]:
         return {"error": "Backlog file not found"}
 
     try:
-        df = pd.read_excel(BACKLOG_FILE, sheet_name='Sheet1')
+        df = load_backlog_model()
     except:
         return {"error": "Could not read backlog file"}
 
-    # Extract state and warehouse
-    def extract_state(zone):
-        if pd.isna(zone):
-            return None
-        return str(zone)[:2].upper()
-
-    def extract_warehouse(inco2):
-        if pd.isna(inco2):
-            return None
-        inco2_upper = str(inco2).upper()
-        if 'MEMPHIS' in inco2_upper:
-            return 'West Memphis'
-        elif 'HOUSTON' in inco2_upper:
-            return 'Houston'
-        elif 'STOCKTON' in inco2_upper:
-            return 'California'
-        return None
-
-    df['State'] = df['Ship-toTrasp.Zone'].apply(extract_state)
-    df['Actual_WH'] = df['Inco 2'].apply(extract_warehouse)
-    df['Model_WH'] = df['State'].apply(get_warehouse_for_state)
-    df['Quantity'] = pd.to_numeric(df['Order Qty'], errors='coerce').fillna(0)
-
     # Filter valid
-    valid_df = df[df['Actual_WH'].notna()].copy()
+    valid_df = df[df['Actual_WH'].notna()]
 
     # Texas analysis (main opportunity)
     tx_df = valid_df[valid_df['State'] == 'TX']
@@ -718,46 +1346,111 @@ def compare_routing() -> Dict[str, Any]:
     }
 
 
+_MONTH_NAMES = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y', '%m-%d-%Y']
+
+DATE_RANGE_EXAMPLES = ["last_month", "last_quarter", "last_year", "ytd", "2024", "2024-06", "December 2025", "01/15/2024"]
+
+
+def _month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1)
+    if month == 12:
+        return start, datetime(year + 1, 1, 1) - timedelta(days=1)
+    return start, datetime(year, month + 1, 1) - timedelta(days=1)
+
+
+@lru_cache(maxsize=1024)
+def compile_date_range(expression: str, today: date) -> Optional[Tuple[datetime, datetime, str]]:
+    """
+    Turn a date filter into an inclusive (start, end, label), or None if it
+    isn't one. Accepts last_month, last_quarter, last_year, ytd, YYYY, YYYY-MM,
+    month names ("December 2025") and MM/DD/YYYY, YYYY-MM-DD, DD/MM/YYYY,
+    MM-DD-YYYY. Memoized per (expression, today).
+    """
+    text = expression.strip()
+    lower = text.lower()
+    today = datetime(today.year, today.month, today.day)
+
+    # Month name with a year, e.g. "December 2025" or "dec 2025"
+    for month_name, month_num in _MONTH_NAMES.items():
+        if month_name in lower:
+            year_match = re.search(r'20\d{2}', text)
+            if year_match:
+                year = int(year_match.group())
+                return _month_bounds(year, month_num) + (f"{month_name.title()} {year}",)
+            break
+
+    if lower == 'last_month':
+        end_date = today.replace(day=1) - timedelta(days=1)
+        return end_date.replace(day=1), end_date, "last month"
+
+    if lower == 'last_quarter':
+        current_quarter = (today.month - 1) // 3
+        if current_quarter == 0:
+            return datetime(today.year - 1, 10, 1), datetime(today.year - 1, 12, 31), "last quarter"
+        start_date, _ = _month_bounds(today.year, (current_quarter - 1) * 3 + 1)
+        _, end_date = _month_bounds(today.year, current_quarter * 3)
+        return start_date, end_date, "last quarter"
+
+    if lower == 'last_year':
+        return datetime(today.year - 1, 1, 1), datetime(today.year - 1, 12, 31), f"year {today.year - 1}"
+
+    if lower == 'ytd':
+        return datetime(today.year, 1, 1), today + timedelta(days=1) - timedelta(seconds=1), f"YTD {today.year}"
+
+    if text.isdigit() and len(text) == 4:
+        year = int(text)
+        return datetime(year, 1, 1), datetime(year, 12, 31), f"year {year}"
+
+    if '-' in text and len(text) == 7:
+        # YYYY-MM
+        try:
+            start_date = datetime.strptime(text + '-01', '%Y-%m-%d')
+        except ValueError:
+            return None
+        return _month_bounds(start_date.year, start_date.month) + (f"month {text}",)
+
+    for fmt in _DATE_FORMATS:
+        try:
+            specific_date = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        end_date = specific_date + timedelta(days=1) - timedelta(seconds=1)
+        return specific_date, end_date, f"date {specific_date.strftime('%Y-%m-%d')}"
+
+    return None
+
+
 def search_orders(customer: str = None, product: str = None, state: str = None,
                   date_range: str = None, limit: int = 10) -> Dict[str, Any]:
     """Search orders by customer, product, state, or date range"""
-    from datetime import datetime, timedelta
+    df_search = load_sales_facts()
 
-    df = load_sales_data()
-
-    if df.empty:
+    if df_search.empty:
         return {"error": "Could not load sales data"}
 
-    # Prepare data
-    df_search = df.copy()
-
-    # Standardize column names we need
-    df_search['customer'] = df_search['Sell-to Name'].fillna('').astype(str)
-    df_search['ship_to'] = df_search['Ship-to Name'].fillna('').astype(str)
-    df_search['product'] = df_search['SO item short text'].fillna('').astype(str)
-    df_search['state'] = df_search['Description.1'].fillna('').astype(str)
-    df_search['quantity'] = pd.to_numeric(df_search['SO item Req.Qty'], errors='coerce').fillna(0)
-
-    # Parse dates
-    date_col = 'SO Document Date'
-    if date_col in df_search.columns:
-        df_search['order_date'] = pd.to_datetime(df_search[date_col], errors='coerce')
-    else:
-        df_search['order_date'] = pd.NaT
+    missing = _missing_sales_columns('Customer', 'Ship To', 'Product', 'State', 'Quantity')
+    if missing:
+        return missing
 
     filters_applied = []
 
     # Filter by customer
     if customer:
-        customer_upper = customer.upper()
-        mask = df_search['customer'].str.upper().str.contains(customer_upper, na=False)
-        mask |= df_search['ship_to'].str.upper().str.contains(customer_upper, na=False)
+        mask = _contains(df_search, 'Customer', customer) | _contains(df_search, 'Ship To', customer)
         df_search = df_search[mask]
         filters_applied.append(f"customer contains '{customer}'")
 
     # Filter by product
     if product:
-        df_search = df_search[df_search['product'].str.upper().str.contains(product.upper(), na=False)]
+        df_search = df_search[_contains(df_search, 'Product', product)]
         filters_applied.append(f"product contains '{product}'")
 
     # Filter by state
@@ -772,98 +1465,51 @@ def search_orders(customer: str = None, product: str = None, state: str = None,
             'MA': 'MASSACHUSETTS', 'MD': 'MARYLAND', 'MN': 'MINNESOTA', 'LA': 'LOUISIANA'
         }
         state_full = state_map.get(state_upper, state_upper)
-        df_search = df_search[df_search['state'].str.upper() == state_full]
+        df_search = df_search[df_search['State'].str.upper() == state_full]
         filters_applied.append(f"state = '{state}'")
 
     # Filter by date range
     if date_range:
-        today = datetime.now()
-        start_date = None
-        end_date = None
-
-        if date_range.lower() == 'last_month':
-            start_date = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-            end_date = today.replace(day=1) - timedelta(days=1)
-            filters_applied.append("last month")
-        elif date_range.lower() == 'last_quarter':
-            current_quarter = (today.month - 1) // 3
-            if current_quarter == 0:
-                start_date = datetime(today.year - 1, 10, 1)
-                end_date = datetime(today.year - 1, 12, 31)
-            else:
-                start_month = (current_quarter - 1) * 3 + 1
-                end_month = current_quarter * 3
-                start_date = datetime(today.year, start_month, 1)
-                end_date = datetime(today.year, end_month + 1, 1) - timedelta(days=1)
-            filters_applied.append("last quarter")
-        elif date_range.lower() == 'last_year':
-            start_date = datetime(today.year - 1, 1, 1)
-            end_date = datetime(today.year - 1, 12, 31)
-            filters_applied.append(f"year {today.year - 1}")
-        elif date_range.lower() == 'ytd':
-            start_date = datetime(today.year, 1, 1)
-            end_date = today
-            filters_applied.append(f"YTD {today.year}")
-        elif date_range.isdigit() and len(date_range) == 4:
-            year = int(date_range)
-            start_date = datetime(year, 1, 1)
-            end_date = datetime(year, 12, 31)
-            filters_applied.append(f"year {year}")
-        elif '-' in date_range and len(date_range) == 7:
-            # YYYY-MM format
-            try:
-                start_date = datetime.strptime(date_range + '-01', '%Y-%m-%d')
-                if start_date.month == 12:
-                    end_date = datetime(start_date.year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = datetime(start_date.year, start_date.month + 1, 1) - timedelta(days=1)
-                filters_applied.append(f"month {date_range}")
-            except:
-                pass
-        else:
-            # Try parsing specific date formats: MM/DD/YYYY, YYYY-MM-DD, etc.
-            date_formats = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y', '%m-%d-%Y']
-            for fmt in date_formats:
-                try:
-                    specific_date = datetime.strptime(date_range, fmt)
-                    start_date = specific_date
-                    end_date = specific_date + timedelta(days=1) - timedelta(seconds=1)
-                    filters_applied.append(f"date {specific_date.strftime('%Y-%m-%d')}")
-                    break
-                except:
-                    continue
-
-        if start_date and end_date:
-            df_search = df_search[
-                (df_search['order_date'] >= start_date) &
-                (df_search['order_date'] <= end_date)
-            ]
-        elif date_range and not filters_applied:
+        compiled = compile_date_range(date_range, date.today())
+        if compiled:
+            start_date, end_date, label = compiled
+            filters_applied.append(label)
+            df_search = sales_date_index().select(df_search, start_date, end_date)
+        elif not filters_applied:
             # Couldn't parse the date
             return {
                 "error": f"Could not parse date: '{date_range}'",
-                "supported_formats": ["last_month", "last_quarter", "last_year", "ytd", "2024", "2024-06", "01/15/2024"]
+                "supported_formats": DATE_RANGE_EXAMPLES
             }
 
     if len(df_search) == 0:
+        # Suggest close names for the text filters that were given
+        suggestions = {}
+        if customer:
+            suggestions["customer"] = _suggestions(sales_suggestion_index('customer'), customer)
+        if product:
+            suggestions["product"] = _suggestions(sales_suggestion_index('product'), product)
+        suggestions = {field: names for field, names in suggestions.items() if names}
+
         return {
             "filters": filters_applied,
             "total_orders": 0,
-            "message": "No orders found matching criteria"
+            "message": "No orders found matching criteria",
+            "suggestions": suggestions if suggestions else None
         }
 
     # Calculate summary
     total_orders = len(df_search)
-    total_quantity = int(df_search['quantity'].sum())
+    total_quantity = int(df_search['Quantity'].sum())
 
     # Top products
-    top_products = df_search.groupby('product')['quantity'].sum().sort_values(ascending=False).head(5)
+    top_products = df_search.groupby('Product', observed=True)['Quantity'].sum().sort_values(ascending=False).head(5)
 
     # Top customers
-    top_customers = df_search.groupby('customer')['quantity'].sum().sort_values(ascending=False).head(5)
+    top_customers = df_search.groupby('Customer', observed=True)['Quantity'].sum().sort_values(ascending=False).head(5)
 
     # Date range in results
-    valid_dates = df_search['order_date'].dropna()
+    valid_dates = df_search['Order Date'].dropna()
     date_range_str = "N/A"
     if len(valid_dates) > 0:
         min_date = valid_dates.min().strftime('%Y-%m-%d')
@@ -872,15 +1518,15 @@ def search_orders(customer: str = None, product: str = None, state: str = None,
 
     # Sample orders (most recent)
     sample_orders = []
-    df_sorted = df_search.sort_values('order_date', ascending=False).head(limit)
+    df_sorted = df_search.sort_values('Order Date', ascending=False).head(limit)
     for _, row in df_sorted.iterrows():
-        order_date = row['order_date'].strftime('%Y-%m-%d') if pd.notna(row['order_date']) else 'N/A'
+        order_date = row['Order Date'].strftime('%Y-%m-%d') if pd.notna(row['Order Date']) else 'N/A'
         sample_orders.append({
             "date": order_date,
-            "customer": row['customer'][:40],
-            "product": row['product'],
-            "quantity": int(row['quantity']),
-            "state": row['state']
+            "customer": row['Customer'][:40],
+            "product": row['Product'],
+            "quantity": int(row['Quantity']),
+            "state": row['State']
         })
 
     return {
@@ -901,58 +1547,175 @@ def search_orders(customer: str = None, product: str = None, state: str = None,
     }
 
 
-def load_freight_data(warehouse: str = "all") -> pd.DataFrame:
-    """Load freight data from warehouse files"""
-    from datetime import datetime
+def _freight_dataset(filepath: str) -> str:
+    return f"freight:{os.path.basename(filepath)}"
 
-    all_data = []
 
-    warehouse_files = {
-        'Houston': FREIGHT_HOUSTON,
-        'West Memphis': FREIGHT_WM,
-        'California': FREIGHT_STOCKTON
+def _read_freight_workbook(wh_name: str, filepath: str, parsed: pd.DataFrame = None) -> pd.DataFrame:
+    """One warehouse's freight workbook (cached per file)"""
+    def build():
+        df = parsed if parsed is not None else _load_workbook(
+            filepath, lambda path: _ingest_freight_workbook(path, wh_name))
+        # Ingestion bookkeeping isn't needed in memory
+        df.attrs = {}
+        return df
+
+    return DATASETS.get(_freight_dataset(filepath), [filepath], build)
+
+
+def _read_freight_workbooks(files: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """Non-empty freight frames of the given {warehouse: workbook} files that exist"""
+    files = {wh: path for wh, path in files.items() if os.path.exists(path)}
+
+    # Workbooks with neither a cached frame nor a fresh snapshot are parsed in parallel
+    cold = {
+        wh_name: filepath for wh_name, filepath in files.items()
+        if not DATASETS.is_current(_freight_dataset(filepath), [filepath])
+        and not is_snapshot_fresh(SNAPSHOT_DIR, filepath)
     }
+    prefetched = _parse_freight_parallel(cold) if len(cold) > 1 else {}
+
+    frames = {}
+    for wh_name, filepath in files.items():
+        try:
+            df = _read_freight_workbook(wh_name, filepath, prefetched.get(wh_name))
+            if not df.empty:
+                frames[wh_name] = df
+        except:
+            pass
+    return frames
+
 
+def load_freight_data(warehouse: str = "all") -> pd.DataFrame:
+    """Load freight data from warehouse files"""
     if warehouse.lower() == 'all':
-        files_to_load = warehouse_files
+        files_to_load = FREIGHT_FILES
     else:
         # Match warehouse name
         matched = None
-        for wh_name in warehouse_files:
+        for wh_name in FREIGHT_FILES:
             if warehouse.lower() in wh_name.lower():
                 matched = wh_name
                 break
         if matched:
-            files_to_load = {matched: warehouse_files[matched]}
+            files_to_load = {matched: FREIGHT_FILES[matched]}
         else:
             return pd.DataFrame()
 
-    for wh_name, filepath in files_to_load.items():
-        if not os.path.exists(filepath):
-            continue
-
-        try:
-            xl = pd.ExcelFile(filepath)
-            for sheet in xl.sheet_names:
-                # Skip non-month sheets
-                if sheet.lower() in ['sheet1', 'sheet2', 'full year']:
-                    continue
-                try:
-                    df = pd.read_excel(filepath, sheet_name=sheet)
-                    if not df.empty:
-                        df['_warehouse'] = wh_name
-                        df['_sheet'] = sheet
-                        all_data.append(df)
-                except:
-                    pass
-        except:
-            pass
+    all_data = list(_read_freight_workbooks(files_to_load).values())
 
     if all_data:
-        return pd.concat(all_data, ignore_index=True)
+        df = pd.concat(all_data, ignore_index=True)
+        # Workbooks carry different warehouse/sheet categories - re-unify them
+        return compact_frame(df, categories=['_warehouse', '_sheet'])
     return pd.DataFrame()
 
 
+def _freight_paths() -> List[str]:
+    return list(FREIGHT_FILES.values())
+
+
+def _freight_cost(df: pd.DataFrame) -> pd.Series:
+    """A workbook's freight cost per row, from whichever column carries it (0 if none does)"""
+    cost = pd.Series(0.0, index=df.index)
+    for col in FREIGHT_COST_COLUMNS:
+        if col in df.columns:
+            cost = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            break
+    if cost.sum() == 0:
+        for col in df.columns:
+            if any(hint in str(col).lower() for hint in FREIGHT_COST_HINTS):
+                values = pd.to_numeric(df[col], errors='coerce').fillna(0)
+                if values.sum() > 0:
+                    return values
+    return cost
+
+
+def _standardize_freight(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One workbook's rows with the columns the freight tools read:
+    ship_date, destination ("Customer-City ST"), weight, cost, warehouse,
+    transport (canonical transport type), state (2-letter code, '' when the
+    destination doesn't end in one), customer and city_state
+    """
+    df = df.copy(deep=False)
+    df['ship_date'] = pd.to_datetime(df['Date Shipped'], errors='coerce') if 'Date Shipped' in df.columns else pd.NaT
+    df['destination'] = df['Ship to on SO'].fillna('').astype(str) if 'Ship to on SO' in df.columns else ''
+    df['weight'] = pd.to_numeric(df['Weight'], errors='coerce').fillna(0) if 'Weight' in df.columns else 0
+    df['cost'] = _freight_cost(df)
+    df['warehouse'] = df['_warehouse']
+    if 'LTL/Closed/Flatbed' in df.columns:
+        types = df['LTL/Closed/Flatbed'].astype(object)
+        names = {value: transport_type(value) or '' for value in types.dropna().unique()}
+        df['transport'] = types.map(names).fillna('')
+    else:
+        df['transport'] = ''
+
+    destination = df['destination'].str.strip()
+    state = destination.str[-2:].str.upper()
+    df['state'] = state.where((destination.str.len() >= 2) & state.str.isalpha(), '')
+    parts = df['destination'].str.split('-')
+    df['customer'] = parts.str[0].str.strip()
+    df['city_state'] = parts.str[-1].str.strip()
+    return df
+
+
+def _build_freight_facts() -> pd.DataFrame:
+    # Each workbook resolves its own cost column, once per data version
+    frames = [_standardize_freight(df) for df in _read_freight_workbooks(FREIGHT_FILES).values()]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return compact_frame(df, categories=['_warehouse', '_sheet', 'warehouse', 'transport', 'state', 'customer', 'city_state'])
+
+
+def load_freight_facts() -> pd.DataFrame:
+    """All warehouses' freight rows, standardized by _standardize_freight (built once per version)"""
+    return DATASETS.get("freight_facts", _freight_paths, _build_freight_facts)
+
+
+def freight_partitions() -> PartitionIndex:
+    """Freight fact rows per warehouse, one contiguous block each"""
+    def build():
+        df = load_freight_facts()
+        return PartitionIndex(df['warehouse'] if 'warehouse' in df.columns else pd.Series(dtype=object))
+
+    return DATASETS.get("freight_partitions", _freight_paths, build)
+
+
+def _freight_warehouses(partitions: PartitionIndex, warehouse: str) -> List[str]:
+    """Warehouses whose name contains the query, case-insensitively"""
+    names = pd.Series(partitions.names, dtype=object)
+    return names[names.str.lower().str.contains(warehouse.lower())].tolist()
+
+
+def freight_date_index() -> DateIndex:
+    """Freight rows sorted by ship_date, for date range filters"""
+    return DATASETS.get(
+        "freight_date_index",
+        _freight_paths,
+        lambda: DateIndex(load_freight_facts()['ship_date'])
+    )
+
+
+def freight_destination_index() -> DestinationIndex:
+    """Distinct freight destinations with their customer, city and state fields, for search_freight"""
+    return DATASETS.get(
+        "freight_destination_index",
+        _freight_paths,
+        lambda: DestinationIndex(load_freight_facts()['Ship to on SO'])
+    )
+
+
+def freight_suggestion_index() -> SuggestionIndex:
+    """Distinct freight destinations for "did you mean" suggestions"""
+    return DATASETS.get(
+        "freight_suggestion_index",
+        _freight_paths,
+        lambda: SuggestionIndex(freight_destination_index().values)
+    )
+
+
 def search_freight(warehouse: str = "all", date_range: str = None,
                    destination: str = None, limit: int = 10) -> Dict[str, Any]:
     """
@@ -962,205 +1725,74 @@ def search_freight(warehouse: str = "all", date_range: str = None,
     - Cross-references dates to find best matches
     - Suggests alternatives when exact match fails
     """
-    from datetime import datetime, timedelta
-
-    df_full = load_freight_data("all")  # Always load all for smart search
+    df_full = load_freight_facts()  # Always load all for smart search
 
     if df_full.empty:
         return {"error": "Could not load freight data"}
 
-    # Standardize columns
-    df_full['ship_date'] = pd.to_datetime(df_full['Date Shipped'], errors='coerce')
-    df_full['destination'] = df_full['Ship to on SO'].fillna('').astype(str)
-    df_full['weight'] = pd.to_numeric(df_full['Weight'], errors='coerce').fillna(0)
-    df_full['warehouse'] = df_full['_warehouse']
-
-    # Try multiple possible cost column names
-    cost_columns = ['Cost', 'Total Cost', 'Freight Cost', 'Amount', 'Total', 'Charge', 'Freight']
-    df_full['cost'] = 0.0
-    for col in cost_columns:
-        if col in df_full.columns:
-            df_full['cost'] = pd.to_numeric(df_full[col], errors='coerce').fillna(0)
-            break
-    # If no cost column found, check all columns for one containing 'cost'
-    if df_full['cost'].sum() == 0:
-        for col in df_full.columns:
-            if 'cost' in col.lower() or 'freight' in col.lower() or 'amount' in col.lower():
-                test_vals = pd.to_numeric(df_full[col], errors='coerce').fillna(0)
-                if test_vals.sum() > 0:
-                    df_full['cost'] = test_vals
-                    break
-    df_full['state'] = df_full['destination'].str.strip().str[-2:].str.upper()
-
-    # Extract customer name (before the hyphen)
-    df_full['customer'] = df_full['destination'].str.split('-').str[0].str.strip()
-    df_full['city_state'] = df_full['destination'].str.split('-').str[-1].str.strip()
-
     filters_applied = []
     smart_notes = []
-    df = df_full.copy()
+    df = df_full
 
     # SMART WAREHOUSE FILTER
     if warehouse.lower() != 'all':
-        df = df[df['warehouse'].str.lower().str.contains(warehouse.lower())]
+        partitions = freight_partitions()
+        df = partitions.select(df_full, _freight_warehouses(partitions, warehouse))
         filters_applied.append(f"warehouse = '{warehouse}'")
 
-    # SMART DESTINATION SEARCH
+    # SMART DESTINATION SEARCH - one ranked lookup over the destination index
     destination_matches_before_date = None
     if destination:
-        dest_upper = destination.upper().strip()
-
-        # Strategy 1: Exact state match (2 chars)
-        if len(dest_upper) == 2:
-            df = df[df['state'] == dest_upper]
-            filters_applied.append(f"state = '{dest_upper}'")
+        match = freight_destination_index().match(destination, df.index.to_numpy())
 
-        # Strategy 2: Detect "Customer-Location" pattern (e.g., "Anixter-Ashland VA")
-        elif '-' in dest_upper:
-            # User is searching for specific customer + location combo
-            parts = dest_upper.split('-')
-            search_customer = parts[0].strip()
-            search_location = '-'.join(parts[1:]).strip()
+        if match is not None:
+            match_type, terms, mask = match
+            df = df[mask]
 
-            # Exact match first
-            exact_match = df[df['destination'].str.upper().str.contains(dest_upper, na=False)]
-
-            if len(exact_match) > 0:
-                df = exact_match
+            if match_type == 'state':
+                filters_applied.append(f"state = '{terms[0]}'")
+            elif match_type == 'exact':
                 filters_applied.append(f"exact match '{destination}'")
-            else:
-                # Try customer + partial location
-                customer_match = df[df['customer'].str.upper().str.contains(search_customer, na=False)]
-                if len(customer_match) > 0:
-                    location_match = customer_match[customer_match['city_state'].str.upper().str.contains(search_location.replace(' ', ''), na=False)]
-                    if len(location_match) > 0:
-                        df = location_match
-                        filters_applied.append(f"customer '{search_customer}' + location '{search_location}'")
-                    else:
-                        # Just use customer match
-                        df = customer_match
-                        filters_applied.append(f"customer '{search_customer}'")
-                        smart_notes.append(f"Found {len(customer_match)} '{search_customer}' shipments, but none to '{search_location}'")
-
-                        # Show which locations this customer shipped to
-                        customer_locations = customer_match['destination'].unique()[:5]
-                        smart_notes.append(f"'{search_customer}' shipped to: {', '.join([loc[-15:] for loc in customer_locations])}")
-                else:
-                    # Fall back to location-only search
-                    location_match = df[df['destination'].str.upper().str.contains(search_location, na=False)]
-                    if len(location_match) > 0:
-                        df = location_match
-                        filters_applied.append(f"location contains '{search_location}'")
-                        smart_notes.append(f"No '{search_customer}' found, showing all shipments to '{search_location}'")
-
-        else:
-            # Strategy 3: Try customer name match first (fuzzy)
-            customer_match = df[df['customer'].str.upper().str.contains(dest_upper, na=False)]
-
-            if len(customer_match) > 0:
-                df = customer_match
+            elif match_type == 'customer_location':
+                filters_applied.append(f"customer '{terms[0]}' + location '{terms[1]}'")
+            elif match_type == 'customer':
+                search_customer, search_location = terms
+                filters_applied.append(f"customer '{search_customer}'")
+                smart_notes.append(f"Found {len(df)} '{search_customer}' shipments, but none to '{search_location}'")
+
+                # Show which locations this customer shipped to
+                customer_locations = df['destination'].unique()[:5]
+                smart_notes.append(f"'{search_customer}' shipped to: {', '.join([loc[-15:] for loc in customer_locations])}")
+            elif match_type == 'location':
+                search_customer, search_location = terms
+                filters_applied.append(f"location contains '{search_location}'")
+                smart_notes.append(f"No '{search_customer}' found, showing all shipments to '{search_location}'")
+            elif match_type == 'customer_contains':
                 filters_applied.append(f"customer contains '{destination}'")
-            else:
-                # Strategy 4: Try full destination match
-                dest_match = df[df['destination'].str.upper().str.contains(dest_upper, na=False)]
-
-                if len(dest_match) > 0:
-                    df = dest_match
-                    filters_applied.append(f"destination contains '{destination}'")
-                else:
-                    # Strategy 5: Try city match
-                    city_match = df[df['city_state'].str.upper().str.contains(dest_upper, na=False)]
-
-                    if len(city_match) > 0:
-                        df = city_match
-                        filters_applied.append(f"city contains '{destination}'")
-                    else:
-                        # Strategy 6: Fuzzy - try partial word match
-                        words = dest_upper.split()
-                        for word in words:
-                            if len(word) >= 3:
-                                partial_match = df[df['destination'].str.upper().str.contains(word, na=False)]
-                                if len(partial_match) > 0:
-                                    df = partial_match
-                                    filters_applied.append(f"partial match '{word}'")
-                                    smart_notes.append(f"No exact match for '{destination}', found partial match on '{word}'")
-                                    break
+            elif match_type == 'destination':
+                filters_applied.append(f"destination contains '{destination}'")
+            elif match_type == 'city':
+                filters_applied.append(f"city contains '{destination}'")
+            elif match_type == 'partial':
+                filters_applied.append(f"partial match '{terms[0]}'")
+                smart_notes.append(f"No exact match for '{destination}', found partial match on '{terms[0]}'")
 
         # Save matches before date filter for smart suggestions
-        destination_matches_before_date = df.copy()
+        destination_matches_before_date = df
 
     # Filter by date
     if date_range:
-        today = datetime.now()
-        start_date = None
-        end_date = None
-
-        # Handle month names like "December 2025"
-        month_names = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6,
-            'jul': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12
-        }
-
-        date_lower = date_range.lower().strip()
-
-        # Check for "December 2025" format
-        for month_name, month_num in month_names.items():
-            if month_name in date_lower:
-                # Extract year
-                import re
-                year_match = re.search(r'20\d{2}', date_range)
-                if year_match:
-                    year = int(year_match.group())
-                    start_date = datetime(year, month_num, 1)
-                    if month_num == 12:
-                        end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-                    else:
-                        end_date = datetime(year, month_num + 1, 1) - timedelta(days=1)
-                    filters_applied.append(f"{month_name.title()} {year}")
-                break
-
-        # Try other formats if not matched
-        if not start_date:
-            if date_lower == 'last_month':
-                start_date = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-                end_date = today.replace(day=1) - timedelta(days=1)
-                filters_applied.append("last month")
-            elif '-' in date_range and len(date_range) == 7:
-                try:
-                    start_date = datetime.strptime(date_range + '-01', '%Y-%m-%d')
-                    if start_date.month == 12:
-                        end_date = datetime(start_date.year + 1, 1, 1) - timedelta(days=1)
-                    else:
-                        end_date = datetime(start_date.year, start_date.month + 1, 1) - timedelta(days=1)
-                    filters_applied.append(f"month {date_range}")
-                except:
-                    pass
-            else:
-                # Try specific date formats
-                date_formats = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y']
-                for fmt in date_formats:
-                    try:
-                        specific_date = datetime.strptime(date_range, fmt)
-                        start_date = specific_date
-                        end_date = specific_date + timedelta(days=1) - timedelta(seconds=1)
-                        filters_applied.append(f"date {specific_date.strftime('%Y-%m-%d')}")
-                        break
-                    except:
-                        continue
-
-        if start_date and end_date:
-            df_before_date = df.copy()
-            df = df[(df['ship_date'] >= start_date) & (df['ship_date'] <= end_date)]
+        compiled = compile_date_range(date_range, date.today())
+        if compiled:
+            start_date, end_date, label = compiled
+            filters_applied.append(label)
+            df = freight_date_index().select(df, start_date, end_date)
 
             # SMART: If no results but we had destination matches, find when they DID ship
             if len(df) == 0 and destination_matches_before_date is not None and len(destination_matches_before_date) > 0:
                 # Find the actual dates this destination shipped
                 actual_dates = destination_matches_before_date['ship_date'].dropna().sort_values()
                 if len(actual_dates) > 0:
-                    recent_dates = actual_dates.tail(5).dt.strftime('%Y-%m-%d').tolist()
                     total_historical = len(destination_matches_before_date)
                     total_weight = int(destination_matches_before_date['weight'].sum())
 
@@ -1181,13 +1813,7 @@ def search_freight(warehouse: str = "all", date_range: str = None,
         # SMART: Suggest similar destinations if nothing found
         suggestions = []
         if destination:
-            # Find similar destination names
-            all_destinations = df_full['destination'].unique()
-            dest_upper = destination.upper()
-            for d in all_destinations:
-                if any(word in d.upper() for word in dest_upper.split() if len(word) >= 3):
-                    suggestions.append(d)
-            suggestions = list(set(suggestions))[:5]
+            suggestions = _suggestions(freight_suggestion_index(), destination)
 
         return {
             "filters": filters_applied,
@@ -1203,7 +1829,7 @@ def search_freight(warehouse: str = "all", date_range: str = None,
     total_cost = float(df['cost'].sum())
 
     # By warehouse
-    by_warehouse = df.groupby('warehouse').agg({
+    by_warehouse = df.groupby('warehouse', observed=True).agg({
         'weight': 'sum',
         'cost': 'sum',
         'destination': 'count'
@@ -1299,14 +1925,17 @@ def recommend_east_coast_location(top_n: int = 5) -> Dict[str, Any]:
 # COST ESTIMATION TOOLS
 # ============================================================================
 
-# Cost per lb by warehouse-state combination (from 2025 freight analysis)
+# Reference cost per lb by warehouse-state combination (from 2025 freight analysis).
+# Rates are derived from the freight workbooks (see lane_rates); these only cover
+# lanes with too few shipments in the data.
 # Note: Cross-country rates estimated based on distance when no direct data available
-COST_RATES = {
+REFERENCE_RATES = {
     'Houston': {
         'TX': 0.0277, 'AR': 0.0344, 'LA': 0.0450, 'OK': 0.0550,
         'MO': 0.0677, 'NE': 0.0713, 'KS': 0.0650,
         'VA': 0.1184, 'MA': 0.1390, 'NY': 0.1712, 'PA': 0.1100,
         'NC': 0.1050, 'GA': 0.0950, 'FL': 0.1100,
+        'MS': 0.0700, 'AL': 0.0850, 'TN': 0.0900, 'NM': 0.0850,
         'default': 0.0850  # Houston average for unknown states
     },
     'West Memphis': {
@@ -1356,6 +1985,9 @@ STATE_ABBREV = {
     'WISCONSIN': 'WI', 'WYOMING': 'WY'
 }
 
+# Destinations the cost tools quote for
+US_STATE_CODES = frozenset(STATE_ABBREV.values()) | {'DC'}
+
 
 def normalize_state(state: str) -> str:
     """Convert state name to abbreviation"""
@@ -1365,11 +1997,43 @@ def normalize_state(state: str) -> str:
     return STATE_ABBREV.get(state_upper, state_upper[:2])
 
 
-def get_cost_rate(warehouse: str, state: str) -> float:
-    """Get cost per lb for a warehouse-state combination"""
-    state_abbr = normalize_state(state)
-    warehouse_rates = COST_RATES.get(warehouse, COST_RATES['West Memphis'])
-    return warehouse_rates.get(state_abbr, warehouse_rates['default'])
+# Shipments a lane needs before its own rate is trusted over the reference
+LANE_MIN_SHIPMENTS = int(os.getenv('PROPHET_LANE_MIN_SHIPMENTS', '5'))
+
+# Overall $/lb the estimates compare against when the freight data has none
+DEFAULT_AVG_RATE = 0.0925
+
+
+def lane_rates() -> LaneRates:
+    """$/lb per (warehouse, state, transport type) lane from the freight facts (built once per version)"""
+    return DATASETS.get(
+        "lane_rates",
+        _freight_paths,
+        lambda: LaneRates(load_freight_facts(), REFERENCE_RATES, TRANSPORT_MODIFIERS,
+                          default_warehouse='West Memphis', min_shipments=LANE_MIN_SHIPMENTS)
+    )
+
+
+def lane_rate(warehouse: str, state: str, transport_type: str = None) -> Dict[str, Any]:
+    """Rate for a warehouse-state lane with its statistics (see LaneRates.quote)"""
+    return lane_rates().quote(warehouse, normalize_state(state), transport_type)
+
+
+def rate_matrix() -> RateMatrix:
+    """Lane rates for every warehouse, state and transport type as one dense array"""
+    def build():
+        lanes = lane_rates()
+        states = list(STATE_ABBREV.values()) + sorted(
+            state for state in lanes.table.index.get_level_values('state').unique() if state
+        )
+        return RateMatrix(lanes, WAREHOUSES, states)
+
+    return DATASETS.get("rate_matrix", _freight_paths, build)
+
+
+def get_cost_rate(warehouse: str, state: str, transport_type: str = None) -> float:
+    """Get cost per lb for a warehouse-state combination (its rate_matrix cell)"""
+    return rate_matrix().rate(warehouse, normalize_state(state), transport_type)
 
 
 def estimate_shipping_cost(from_warehouse: str, to_state: str,
@@ -1388,6 +2052,8 @@ def estimate_shipping_cost(from_warehouse: str, to_state: str,
 
     # Normalize inputs
     state_abbr = normalize_state(to_state)
+    if state_abbr not in US_STATE_CODES:
+        return {"error": f"Unknown destination state: {to_state}"}
 
     # Match warehouse name
     warehouse_map = {
@@ -1400,22 +2066,17 @@ def estimate_shipping_cost(from_warehouse: str, to_state: str,
     }
     warehouse = warehouse_map.get(from_warehouse.lower(), from_warehouse)
 
-    # Get base cost rate
-    base_rate = get_cost_rate(warehouse, state_abbr)
+    # Lane rate - the transport type's own lane if it has one, else the modifier applied
+    quote = lane_rate(warehouse, state_abbr, transport_type)
+    base_rate = quote['base_rate']
 
-    # Apply transport modifier
-    modifier = 1.0
-    if transport_type:
-        transport_upper = transport_type.title()
-        modifier = TRANSPORT_MODIFIERS.get(transport_upper, 1.0)
-
-    # Calculate cost
-    adjusted_rate = base_rate * modifier
+    # Calculate cost - the same rate_matrix cell bulk quotes and analyze_cost_savings use
+    adjusted_rate = get_cost_rate(warehouse, state_abbr, transport_type)
     estimated_cost = weight_lbs * adjusted_rate
     cost_per_pallet = LBS_PER_PALLET * adjusted_rate
 
     # Get comparison data
-    overall_avg_rate = 0.0925  # Overall average from analysis
+    overall_avg_rate = round(lane_rates().overall or DEFAULT_AVG_RATE, 4)  # Overall average of the freight data
     savings_vs_avg = (overall_avg_rate - adjusted_rate) * weight_lbs
 
     return {
@@ -1437,7 +2098,13 @@ def estimate_shipping_cost(from_warehouse: str, to_state: str,
             "vs_average": f"{'$' + str(abs(round(savings_vs_avg, 2))) + ' cheaper' if savings_vs_avg > 0 else '$' + str(abs(round(savings_vs_avg, 2))) + ' more expensive'}",
             "pct_vs_average": round((adjusted_rate / overall_avg_rate - 1) * 100, 1)
         },
-        "confidence": "HIGH" if state_abbr in COST_RATES.get(warehouse, {}) else "MEDIUM",
+        "lane": {
+            "rate_source": quote['source'],
+            "shipments": quote['shipments'],
+            "median_per_lb": round(quote['median'], 4) if quote['median'] is not None else None,
+            "p90_per_lb": round(quote['p90'], 4) if quote['p90'] is not None else None
+        },
+        "confidence": "HIGH" if quote['source'] != 'default' else "MEDIUM",
         "note": f"Based on 2025 freight data. {warehouse} → {state_abbr}: ${base_rate:.4f}/lb = ${cost_per_pallet:.2f}/pallet"
     }
 
@@ -1510,6 +2177,94 @@ def compare_routing_cost(to_state: str, weight_lbs: float = None, pallets: float
     }
 
 
+# Each warehouse's own state - shipments there are its local rate
+WAREHOUSE_HOME_STATES = {'Houston': 'TX', 'West Memphis': 'AR', 'California': 'CA'}
+
+# East Coast states, and those a new East Coast warehouse would serve locally
+EAST_COAST_STATES = ['VA', 'NC', 'SC', 'GA', 'FL', 'MD', 'PA', 'NJ', 'NY', 'CT', 'MA', 'DE']
+EAST_COAST_COVERAGE = EAST_COAST_STATES[:7]
+
+# Same-destination LTL shipments this many days apart could share a truck
+CONSOLIDATION_WINDOW_DAYS = 2
+
+
+def counterfactuals() -> CounterfactualEngine:
+    """Historical freight shipments priced on the rate matrix, for what-if routing"""
+    return DATASETS.get(
+        "counterfactuals",
+        _freight_paths,
+        lambda: CounterfactualEngine(load_freight_facts(), rate_matrix())
+    )
+
+
+def _column(values, size: int) -> list:
+    return list(values) if values is not None else [None] * size
+
+
+def estimate_shipping_cost_bulk(to_states: List[str], weight_lbs: List[float] = None,
+                                pallets: List[float] = None, transport_types: List[str] = None) -> Dict[str, Any]:
+    """
+    Cost of many shipments from every warehouse in one vectorized pass
+
+    Columnar input: shipment i goes to to_states[i] and weighs weight_lbs[i],
+    or pallets[i] pallets when its weight is missing, by transport_types[i].
+    Costs come back per warehouse in the same order.
+    """
+    size = len(to_states)
+    weights = pd.to_numeric(pd.Series(_column(weight_lbs, size), dtype=object), errors='coerce')
+    pallet_counts = pd.to_numeric(pd.Series(_column(pallets, size), dtype=object), errors='coerce')
+    transports = pd.Series(_column(transport_types, size), dtype=object)
+    if not (len(weights) == len(pallet_counts) == len(transports) == size):
+        return {"error": "to_states, weight_lbs, pallets and transport_types must have the same length"}
+
+    # Each distinct state / transport spelling is normalized once
+    states = pd.Series(list(to_states), dtype=object)
+    state_codes, state_values = pd.factorize(states)
+    normalized = np.array([normalize_state(str(value)) for value in state_values] + [''], dtype=object)
+    known = np.isin(normalized, list(US_STATE_CODES))[state_codes]
+    transport_codes, transport_values = pd.factorize(transports)
+    canonical = np.array([transport_type(value) for value in transport_values] + [None], dtype=object)
+
+    weights = weights.fillna(pallet_counts * LBS_PER_PALLET).to_numpy(dtype=float)
+    # Shipments to unknown states are reported, not priced, as a single quote rejects them
+    priced = ~np.isnan(weights) & known
+    costs = rate_matrix().costs(normalized[state_codes], np.nan_to_num(weights), canonical[transport_codes])
+    costs[~priced] = np.nan
+
+    warehouses = WAREHOUSES
+    cheapest = np.full(size, None, dtype=object)
+    cheapest[priced] = np.array(warehouses, dtype=object)[costs[priced].argmin(axis=1)] if priced.any() else []
+    recommended = ROUTING.route(states.fillna('')).where(known, None)
+    recommended_costs = np.full(size, np.nan)
+    for i, warehouse in enumerate(warehouses):
+        rows = (recommended == warehouse).to_numpy()
+        recommended_costs[rows] = costs[rows, i]
+
+    def rounded(values):
+        return [round(float(v), 2) if not np.isnan(v) else None for v in values]
+
+    return {
+        "shipments": size,
+        "priced": int(priced.sum()),
+        "warehouses": warehouses,
+        "to_states": list(normalized[state_codes]),
+        "weight_lbs": rounded(weights),
+        "costs": {wh: rounded(costs[:, i]) for i, wh in enumerate(warehouses)},
+        "cheapest": cheapest.tolist(),
+        "recommended": recommended.tolist(),
+        "totals": {
+            **{wh: round(float(np.nansum(costs[:, i])), 2) for i, wh in enumerate(warehouses)},
+            "cheapest": round(float(np.nansum(np.nanmin(costs[priced], axis=1))) if priced.any() else 0.0, 2),
+            "recommended": round(float(np.nansum(recommended_costs)), 2)
+        },
+        "errors": [
+            {"index": int(i), "error": f"Unknown destination state: {to_states[i]}" if not known[i]
+             else "Must provide either weight_lbs or pallets"}
+            for i in np.flatnonzero(~priced)
+        ] or None
+    }
+
+
 def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
     """Analyze cost savings opportunities using ACTUAL freight data"""
 
@@ -1518,50 +2273,38 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
         "scenarios": []
     }
 
-    # Helper to standardize freight DataFrame columns
-    def standardize_freight_df(df):
-        if df.empty:
-            return df
-        df = df.copy()
-        df['destination'] = df['Ship to on SO'].fillna('').astype(str) if 'Ship to on SO' in df.columns else ''
-        df['weight'] = pd.to_numeric(df['Weight'], errors='coerce').fillna(0) if 'Weight' in df.columns else 0
-        # Try to find cost column
-        df['cost'] = 0.0
-        cost_columns = ['Cost', 'Total Cost', 'Freight Cost', 'Amount', 'Total', 'Charge', 'Freight']
-        for col in cost_columns:
-            if col in df.columns:
-                df['cost'] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                break
-        if df['cost'].sum() == 0:
-            for col in df.columns:
-                if 'cost' in col.lower() or 'freight' in col.lower() or 'amount' in col.lower():
-                    test_vals = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                    if test_vals.sum() > 0:
-                        df['cost'] = test_vals
-                        break
-        return df
-
-    # Load actual freight data
-    df_wm = standardize_freight_df(load_freight_data("West Memphis"))
-    df_all = standardize_freight_df(load_freight_data("all"))
-
-    # Extract state from destination (last 2 chars like "Fort Worth TX" -> "TX")
-    def get_state(dest):
-        if pd.isna(dest) or not dest:
-            return ''
-        dest = str(dest).strip()
-        # Handle format "Customer-City ST"
-        if len(dest) >= 2:
-            last_two = dest[-2:].upper()
-            if last_two.isalpha():
-                return last_two
-        return ''
+    # Actual West Memphis shipments - that warehouse's block of the freight facts
+    df_wm = freight_partitions().select(load_freight_facts(), ['West Memphis'])
+
+    # Every scenario re-prices the historical shipments it changes, all in one pass
+    engine = counterfactuals()
+    from_wm = engine.warehouse == 'West Memphis'
+    local = engine.state == pd.Series(engine.warehouse, dtype=object).map(WAREHOUSE_HOME_STATES).to_numpy()
+    local_rate = engine.actual_rate(local) or get_cost_rate('Houston', 'TX')
+    texas_from_wm = from_wm & (engine.state == 'TX')
+    houston_rates = engine.rates_from('Houston')
+    ltl_groups = engine.consolidation_groups('LTL', CONSOLIDATION_WINDOW_DAYS)
+    closed_rates = engine.rates_from(transport='Closed')
+    repriced = engine.evaluate({
+        # Texas orders shipped from Houston instead
+        "routing_optimization": (texas_from_wm, houston_rates),
+        # East Coast orders shipped locally at the warehouses' in-state rate
+        "east_coast_warehouse": (from_wm & np.isin(engine.state, EAST_COAST_COVERAGE), local_rate),
+        # Groupable LTL shipments moved as closed trailer loads
+        "consolidation": (ltl_groups >= 0, closed_rates),
+    })
+
+    def per_lb(cost, weight, fallback):
+        return round(cost / weight, 4) if weight > 0 else round(fallback, 4)
+
+    def breakdown(result):
+        return {key: result[key] for key in ('actual_cost', 'modeled_cost', 'counterfactual_cost',
+                                             'by_warehouse', 'by_month', 'top_lanes')}
 
     # Scenario 1: Routing Optimization (Texas through West Memphis)
     if scenario in ["routing_optimization", "all"]:
         # Get ACTUAL Texas volume from West Memphis
         if len(df_wm) > 0:
-            df_wm['state'] = df_wm['destination'].apply(get_state)
             tx_from_wm = df_wm[df_wm['state'] == 'TX']
             texas_volume = int(tx_from_wm['weight'].sum()) if len(tx_from_wm) > 0 else 0
             texas_shipments = len(tx_from_wm)
@@ -1586,13 +2329,25 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
             texas_actual_cost = 0
             top_tx_destinations = []
 
-        # Calculate potential savings
-        wm_to_tx_rate = COST_RATES['West Memphis'].get('TX', 0.1042)
-        houston_to_tx_rate = COST_RATES['Houston'].get('TX', 0.0277)
-        potential_savings = texas_volume * (wm_to_tx_rate - houston_to_tx_rate)
+        # Each paid Texas shipment re-priced from Houston, against what it cost from West Memphis
+        rerouted = repriced["routing_optimization"]
+        wm_to_tx_rate = round(get_cost_rate('West Memphis', 'TX'), 4)
+        houston_to_tx_rate = round(get_cost_rate('Houston', 'TX'), 4)
+        potential_savings = rerouted['savings']
 
         # What it would cost from Houston
-        houston_estimated_cost = texas_volume * houston_to_tx_rate
+        houston_estimated_cost = rerouted['counterfactual_cost']
+
+        # The median paid Texas shipment, as shipped and from Houston
+        examples = []
+        median = engine.median_group(np.where(texas_from_wm, np.arange(len(engine)), -1), houston_rates)
+        if median is not None:
+            examples.append({
+                "example": f"Median Texas shipment ({median['weight_lbs']:,} lbs to {median['destination'][:40]})",
+                "from_west_memphis": median['actual_cost'],
+                "from_houston": median['counterfactual_cost'],
+                "savings": median['savings']
+            })
 
         routing_scenario = {
             "name": "Routing Optimization",
@@ -1601,7 +2356,10 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
                 "texas_volume_lbs": texas_volume,
                 "texas_shipments": texas_shipments,
                 "actual_cost_paid": round(texas_actual_cost, 2),
+                # Only shipments with a recorded cost are re-priced
                 "estimated_from_houston": round(houston_estimated_cost, 2),
+                "estimated_from_houston_shipments": rerouted['shipments'],
+                "estimated_from_houston_lbs": rerouted['weight_lbs'],
                 "top_destinations": top_tx_destinations
             },
             "rates": {
@@ -1611,29 +2369,22 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
             },
             "annual_opportunity": {
                 "texas_volume_lbs": texas_volume,
+                "repriced_shipments": rerouted['shipments'],
+                "repriced_volume_lbs": rerouted['weight_lbs'],
                 "potential_savings": round(potential_savings, 2),
-                "savings_pct": round((1 - houston_to_tx_rate / wm_to_tx_rate) * 100, 1) if wm_to_tx_rate > 0 else 0
+                "savings_pct": round(potential_savings / rerouted['actual_cost'] * 100, 1) if rerouted['actual_cost'] > 0 else 0
             },
-            "examples": [
-                {
-                    "example": "Texas truckload (40,000 lbs)",
-                    "from_west_memphis": round(40000 * wm_to_tx_rate, 2),
-                    "from_houston": round(40000 * houston_to_tx_rate, 2),
-                    "savings": round(40000 * (wm_to_tx_rate - houston_to_tx_rate), 2)
-                }
-            ]
+            "examples": examples,
+            "counterfactual": breakdown(rerouted)
         }
         results["scenarios"].append(routing_scenario)
 
     # Scenario 2: East Coast Warehouse
     if scenario in ["east_coast_warehouse", "all"]:
-        # Define East Coast states
-        east_coast_states = ['VA', 'NC', 'SC', 'GA', 'FL', 'MD', 'PA', 'NJ', 'NY', 'CT', 'MA', 'DE']
+        east_coast_states = EAST_COAST_STATES
 
         # Get ACTUAL East Coast volume from West Memphis
         if len(df_wm) > 0:
-            if 'state' not in df_wm.columns:
-                df_wm['state'] = df_wm['destination'].apply(get_state)
             ec_from_wm = df_wm[df_wm['state'].isin(east_coast_states)]
             east_coast_volume = int(ec_from_wm['weight'].sum()) if len(ec_from_wm) > 0 else 0
             east_coast_shipments = len(ec_from_wm)
@@ -1658,13 +2409,14 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
             east_coast_actual_cost = 0
             top_ec_destinations = []
 
-        # Estimate savings with local East Coast warehouse
-        avg_wm_rate = 0.0925  # Average WM rate to East Coast
-        estimated_local_rate = 0.035  # Similar to Houston local rates
-        coverage_pct = 0.65  # Estimated coverage
-
-        covered_volume = east_coast_volume * coverage_pct
-        potential_savings = covered_volume * (avg_wm_rate - estimated_local_rate)
+        # Paid covered shipments re-priced at the in-state rate the warehouses actually pay
+        covered = repriced["east_coast_warehouse"]
+        covered_volume = covered['weight_lbs']
+        avg_wm_rate = per_lb(covered['actual_cost'], covered_volume, get_cost_rate('West Memphis', 'VA'))
+        estimated_local_rate = round(local_rate, 4)
+        coverage_volume = engine.weight[from_wm & np.isin(engine.state, EAST_COAST_COVERAGE)].sum()
+        coverage_pct = coverage_volume / east_coast_volume if east_coast_volume > 0 else 0
+        potential_savings = covered['savings']
 
         east_coast_scenario = {
             "name": "East Coast Warehouse",
@@ -1677,39 +2429,59 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
             },
             "with_east_coast": {
                 "estimated_local_rate": estimated_local_rate,
-                "coverage_states": east_coast_states[:7],
+                "coverage_states": EAST_COAST_COVERAGE,
                 "estimated_coverage_pct": int(coverage_pct * 100)
             },
             "savings_estimate": {
                 "covered_volume": int(covered_volume),
-                "current_cost": round(covered_volume * avg_wm_rate, 2),
-                "new_cost": round(covered_volume * estimated_local_rate, 2),
+                "current_cost": covered['actual_cost'],
+                "new_cost": covered['counterfactual_cost'],
                 "annual_savings": round(potential_savings, 2),
-                "savings_pct": round((1 - estimated_local_rate / avg_wm_rate) * 100, 1)
-            }
+                "savings_pct": round((1 - estimated_local_rate / avg_wm_rate) * 100, 1) if avg_wm_rate > 0 else 0
+            },
+            "counterfactual": breakdown(covered)
         }
         results["scenarios"].append(east_coast_scenario)
 
     # Scenario 3: Consolidation
     if scenario in ["consolidation", "all"]:
+        # Recorded $/lb of each transport type; LTL shipments that could share a truck
+        # are re-priced on their lane's closed trailer rate
+        consolidated = repriced["consolidation"]
+        ltl_rate = round(engine.actual_rate(engine.transport == 'LTL') or get_cost_rate('West Memphis', '', 'LTL'), 4)
+        closed_rate = round(engine.actual_rate(engine.transport == 'Closed') or get_cost_rate('West Memphis', '', 'Closed'), 4)
+
+        # The median group of LTL shipments that could have shared a truck
+        example = None
+        median = engine.median_group(ltl_groups, closed_rates)
+        if median is not None:
+            example = {
+                "scenario": f"{median['shipments']} LTL shipments to {median['destination'][:40]} "
+                            f"({median['weight_lbs']:,} lbs) → 1 closed trailer load",
+                "ltl_cost": median['actual_cost'],
+                "consolidated_cost": median['counterfactual_cost'],
+                "savings": median['savings'],
+                "savings_pct": round(median['savings'] / median['actual_cost'] * 100, 1) if median['actual_cost'] > 0 else 0
+            }
+
         consolidation_scenario = {
             "name": "Shipment Consolidation",
             "description": "Consolidate LTL shipments into full truckloads",
             "comparison": {
-                "ltl_rate": 0.1554,
-                "closed_trailer_rate": 0.0824,
-                "savings_per_lb": round(0.1554 - 0.0824, 4)
-            },
-            "example": {
-                "scenario": "5 LTL shipments of 8,000 lbs each → 1 full truckload of 40,000 lbs",
-                "ltl_cost": round(40000 * 0.1554, 2),
-                "consolidated_cost": round(40000 * 0.0824, 2),
-                "savings": round(40000 * (0.1554 - 0.0824), 2),
-                "savings_pct": round((1 - 0.0824/0.1554) * 100, 1)
+                "ltl_rate": ltl_rate,
+                "closed_trailer_rate": closed_rate,
+                "savings_per_lb": round(ltl_rate - closed_rate, 4)
             },
+            "example": example,
             "annual_opportunity": {
-                "note": "Review orders to same destination within 1-2 day window for consolidation"
-            }
+                "consolidatable_shipments": consolidated['shipments'],
+                "consolidatable_lbs": consolidated['weight_lbs'],
+                "actual_cost_paid": consolidated['actual_cost'],
+                "consolidated_cost": consolidated['counterfactual_cost'],
+                "potential_savings": consolidated['savings'],
+                "note": f"LTL orders to the same destination within {CONSOLIDATION_WINDOW_DAYS} days of each other"
+            },
+            "counterfactual": breakdown(consolidated)
         }
         results["scenarios"].append(consolidation_scenario)
 
@@ -1735,33 +2507,164 @@ def analyze_cost_savings(scenario: str = "all") -> Dict[str, Any]:
     return results
 
 
+# ============================================================================
+# WARM-UP
+# ============================================================================
+
+# Datasets loaded before the API reports ready, in load order
+WARM_UP = [
+    ("sales_facts", lambda: load_sales_facts()),
+    ("sales_facts_usa", lambda: load_sales_facts(usa_only=True)),
+    ("sales_data_months", get_sales_data_months),
+    ("sales_indexes", lambda: [sales_text_index(col) for col in ('Product', 'Customer', 'Ship To')]
+                      + [sales_text_index('Product', usa_only=True)]),
+    ("sales_date_index", sales_date_index),
+    ("sales_cube", lambda: sales_cube().cells),
+    ("distribution_table", distribution_table),
+    ("backlog", load_backlog_model),
+    ("freight", load_freight_facts),
+    ("freight_partitions", freight_partitions),
+    ("freight_date_index", freight_date_index),
+    ("freight_destination_index", freight_destination_index),
+    ("lane_rates", lane_rates),
+    ("rate_matrix", rate_matrix),
+    ("counterfactuals", counterfactuals),
+    ("sales_suggestion_indexes", lambda: [sales_suggestion_index(field) for field in ('customer', 'product')]),
+    ("freight_suggestion_index", freight_suggestion_index),
+]
+
+_warm_status: Dict[str, Dict[str, Any]] = {}
+
+
+def warm_up() -> Dict[str, Any]:
+    """Load every dataset in WARM_UP so the first request is served from memory"""
+    import time
+
+    for name, load in WARM_UP:
+        _warm_status[name] = {"state": "loading"}
+        start = time.time()
+        try:
+            value = load()
+            status = {"state": "ready", "load_ms": round((time.time() - start) * 1000, 1)}
+            if isinstance(value, pd.DataFrame):
+                status["rows"] = len(value)
+        except Exception as e:
+            status = {"state": "error", "error": str(e),
+                      "load_ms": round((time.time() - start) * 1000, 1)}
+        _warm_status[name] = status
+
+    return readiness()
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Per-dataset warm-up state - ready once every dataset has loaded. Status is
+    loading until all have finished, then ready, or degraded if any failed.
+    """
+    datasets = {name: dict(_warm_status.get(name, {"state": "pending"})) for name, _ in WARM_UP}
+    failed = [name for name, info in datasets.items() if info["state"] == "error"]
+    finished = all(info["state"] in ("ready", "error") for info in datasets.values())
+    return {
+        "ready": finished and not failed,
+        "status": ("degraded" if failed else "ready") if finished else "loading",
+        "failed": failed,
+        "data_version": data_version(),
+        "datasets": datasets
+    }
+
+
 # ============================================================================
 # TOOL EXECUTOR
 # ============================================================================
 
+TOOL_FUNCTIONS = {
+    "get_distribution": get_distribution,
+    "get_distribution_batch": get_distribution_batch,
+    "analyze_state": analyze_state,
+    "get_warehouse_info": get_warehouse_info,
+    "forecast_demand": forecast_demand,
+    "get_backlog_summary": get_backlog_summary,
+    "compare_routing": compare_routing,
+    "recommend_east_coast_location": recommend_east_coast_location,
+    "search_orders": search_orders,
+    "search_freight": search_freight,
+    "estimate_shipping_cost": estimate_shipping_cost,
+    "compare_routing_cost": compare_routing_cost,
+    "estimate_shipping_cost_bulk": estimate_shipping_cost_bulk,
+    "analyze_cost_savings": analyze_cost_savings,
+    "google_maps": google_maps_func
+}
+
+# Searches resolve relative dates ("last_month") against today, so they expire
+# sooner; google_maps depends on external services, not the data files
+TOOL_CACHE_TTLS = {
+    "search_orders": 600,
+    "search_freight": 600,
+    "google_maps": 0,
+    # Thousands of quotes per call: one vectorized pass is cheaper than keying a cache on them
+    "estimate_shipping_cost_bulk": 0,
+}
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE, TOOL_CACHE_TTLS, RESULT_CACHE_TTL, verify=RESULT_CACHE_VERIFY)
+
+def _state_abbrev(state: str) -> str:
+    """'texas', 'Tx', 'TX' -> 'TX' (other values only uppercased, as normalize_state would see them)"""
+    state_upper = state.upper().strip()
+    return STATE_ABBREV.get(state_upper, state_upper)
+
+
+# Canonical form of arguments a tool already treats case- or alias-insensitively,
+# so equivalent calls share one result cache entry. Only arguments the tool never
+# echoes back are listed: every call sharing an entry must get the same payload
+# (RESULT_CACHE_VERIFY=1 checks this on each hit). States in analyze_state and
+# search_orders, and the search_freight warehouse, appear in the response as typed.
+TOOL_ARG_NORMALIZERS = {
+    "search_orders": {"date_range": lambda value: value.strip().lower()},
+    "search_freight": {"date_range": lambda value: value.strip().lower()},
+    "estimate_shipping_cost": {"to_state": _state_abbrev},
+    "compare_routing_cost": {"to_state": _state_abbrev},
+}
+
+
+def normalize_tool_args(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """Cache key for a tool call: defaults filled in and aliases resolved"""
+    bound = inspect.signature(TOOL_FUNCTIONS[tool_name]).bind(**tool_input)
+    bound.apply_defaults()
+    args = dict(bound.arguments)
+    for name, normalize in TOOL_ARG_NORMALIZERS.get(tool_name, {}).items():
+        if isinstance(args.get(name), str):
+            args[name] = normalize(args[name])
+    return args
+
+
+def call_tool(tool_name: str, **tool_input) -> Dict[str, Any]:
+    """
+    Run a tool through the result cache, on one pinned data version.
+    Exceptions propagate; execute_tool turns them into error results.
+    """
+    # One tool call reads one data version, even if a reload lands mid-call
+    with DATASETS.pinned():
+        try:
+            args = normalize_tool_args(tool_name, tool_input)
+        except TypeError:
+            # Bad arguments - let the tool raise its own error
+            return TOOL_FUNCTIONS[tool_name](**tool_input)
+        # Equivalent calls share a result, but the tool still sees what the caller passed
+        return RESULT_CACHE.call(tool_name, args, data_version(), lambda: TOOL_FUNCTIONS[tool_name](**tool_input),
+                                 raw_args=tool_input)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return RESULT_CACHE.stats()
+
+
 def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
     """Execute a tool by name"""
 
-    tools_map = {
-        "get_distribution": get_distribution,
-        "analyze_state": analyze_state,
-        "get_warehouse_info": get_warehouse_info,
-        "forecast_demand": forecast_demand,
-        "get_backlog_summary": get_backlog_summary,
-        "compare_routing": compare_routing,
-        "recommend_east_coast_location": recommend_east_coast_location,
-        "search_orders": search_orders,
-        "search_freight": search_freight,
-        "estimate_shipping_cost": estimate_shipping_cost,
-        "compare_routing_cost": compare_routing_cost,
-        "analyze_cost_savings": analyze_cost_savings,
-        "google_maps": google_maps_func
-    }
-
-    if tool_name not in tools_map:
+    if tool_name not in TOOL_FUNCTIONS:
         return {"error": f"Unknown tool: {tool_name}"}
 
     try:
-        return tools_map[tool_name](**tool_input)
+        return call_tool(tool_name, **tool_input)
     except Exception as e:
         return {"error": str(e)}